@@ -1,24 +1,38 @@
 """Main bundler orchestration."""
 
+import io
+import os
 import re
-from dataclasses import dataclass
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from itertools import chain
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 
 from pynescript.ast import unparse
 from pynescript.ast.grammar.asdl.generated.PinescriptASTNode import Script
-from pynescript.ast.node import Import
+from pynescript.ast.node import Expr, Import
 
 from pinecone.config import PineconeConfig
 from pinecone.renamer import (
     IdentifierRenamer,
     build_rename_map,
-    extract_top_level_identifiers,
+    extract_statement_identifiers,
 )
 from pinecone.resolver import DependencyGraph, Module, resolve_dependencies
 
+# Generic type function calls mangled by pynescript's unparser.
+# Pattern matches: identifier.new < type > args
+# Where args can be a single number or comma-separated numbers
+# Examples: array.new < line > 500 -> array.new<line>(500)
+#           matrix.new < float > 0, 0 -> matrix.new<float>(0, 0)
+_GENERIC_NEW_PATTERN = re.compile(r"(\w+\.new)\s*<\s*(\w+)\s*>\s*(\d+(?:\s*,\s*\d+)*)")
 
-@dataclass
+# Calls that declare the script type and must stay at the top of the output
+_DECLARATION_NAMES = frozenset({"indicator", "strategy", "library"})
+
+
+@dataclass(slots=True)
 class BundleResult:
     """Result of bundling operation."""
 
@@ -26,24 +40,53 @@ class BundleResult:
     modules_count: int
     entry_path: Path
     output_path: Path
+    # Source text of every module that went into the bundle, by resolved path
+    module_sources: dict[Path, str] = field(default_factory=dict)
+
+
+def _strip_version_lines(text: str) -> str:
+    """Remove any `//@version` annotation lines from unparsed source.
+
+    Args:
+        text: Unparsed PineScript source.
+
+    Returns:
+        The source without version annotation lines.
+    """
+    # Version lines almost never appear in statement output, so avoid
+    # splitting and rejoining the whole text unless one is present
+    if "//@version" not in text:
+        return text
+    lines = [line for line in text.split("\n") if not line.startswith("//@version")]
+    return "\n".join(lines)
+
+
+def unparse_statements(nodes: list[Any]) -> str:
+    """Unparse a sequence of AST statement nodes in one pass.
+
+    pynescript's unparse() expects a Script node, so we wrap the statements.
+    Unparsing a whole section at once avoids one full unparser run per statement.
+
+    Args:
+        nodes: AST statement nodes.
+
+    Returns:
+        PineScript source string, one statement after another.
+    """
+    wrapper = Script(body=nodes, annotations=[])
+    return _strip_version_lines(unparse(wrapper))
 
 
 def unparse_single(node: Any) -> str:
     """Unparse a single AST statement node.
 
-    pynescript's unparse() expects a Script node, so we wrap single statements.
-
     Args:
         node: An AST statement node.
 
     Returns:
         PineScript source string.
     """
-    wrapper = Script(body=[node], annotations=[])
-    result = unparse(wrapper)
-    # Remove any version annotations that might appear
-    lines = [line for line in result.split("\n") if not line.startswith("//@version")]
-    return "\n".join(lines)
+    return unparse_statements([node])
 
 
 def _extract_declaration(entry: Module) -> tuple[Any | None, list[Any]]:
@@ -62,9 +105,12 @@ def _extract_declaration(entry: Module) -> tuple[Any | None, list[Any]]:
 
     for stmt in entry.ast.body:
         # Check if this is an indicator/strategy/library call
-        if hasattr(stmt, "value") and hasattr(stmt.value, "func"):
-            func = stmt.value.func
-            if hasattr(func, "id") and func.id in ("indicator", "strategy", "library"):
+        if isinstance(stmt, Expr):
+            try:
+                name = stmt.value.func.id
+            except AttributeError:
+                name = None
+            if name in _DECLARATION_NAMES:
                 declaration = stmt
                 continue
         other.append(stmt)
@@ -86,39 +132,41 @@ def _get_version(entry: Module) -> str:
     return "//@version=5"
 
 
-def _extract_external_imports(module: Module) -> list[Import]:
-    """Extract external TradingView import statements from a module.
+def _analyze_module(module: Module) -> tuple[list[str], list[Import]]:
+    """Collect top-level identifiers and external imports in one pass over the body.
 
     Args:
-        module: The module to extract imports from.
+        module: The module to analyze.
 
     Returns:
-        List of Import AST nodes.
+        Tuple of (top_level_identifiers, external_imports).
     """
-    imports = []
+    identifiers: list[str] = []
+    imports: list[Import] = []
     for stmt in module.ast.body:
         if isinstance(stmt, Import):
             imports.append(stmt)
-    return imports
+        else:
+            identifiers.extend(extract_statement_identifiers(stmt))
+    return identifiers, imports
 
 
-def _deduplicate_imports(all_imports: list[Import]) -> list[Import]:
+def _deduplicate_imports(all_imports: Iterable[Import]) -> list[Import]:
     """Deduplicate external imports, keeping the first occurrence.
 
     If the same library is imported with different aliases, keeps the first one.
 
     Args:
-        all_imports: List of all Import nodes from all modules.
+        all_imports: Import nodes from all modules, in order. Any iterable
+            works, so callers can pass a lazy chain of per-module imports.
 
     Returns:
         Deduplicated list of Import nodes.
     """
-    seen: dict[str, Import] = {}
+    seen: dict[tuple[str, str, int], Import] = {}
     for imp in all_imports:
-        # Create unique key from namespace/name/version
-        key = f"{imp.namespace}/{imp.name}/{imp.version}"
-        if key not in seen:
-            seen[key] = imp
+        # Unique key from namespace/name/version, without formatting a string
+        seen.setdefault((imp.namespace, imp.name, imp.version), imp)
     return list(seen.values())
 
 
@@ -146,25 +194,88 @@ def _postprocess_output(output: str) -> str:
     Returns:
         Post-processed output with fixes applied.
     """
-    # Fix generic type function calls
-    # Pattern matches: identifier.new < type > args
-    # Where args can be a single number or comma-separated numbers
-    # Examples: array.new < line > 500 -> array.new<line>(500)
-    #           matrix.new < float > 0, 0 -> matrix.new<float>(0, 0)
-    pattern = r"(\w+\.new)\s*<\s*(\w+)\s*>\s*(\d+(?:\s*,\s*\d+)*)"
-    replacement = r"\1<\2>(\3)"
-    output = re.sub(pattern, replacement, output)
+    # Fix generic type function calls. Most bundles never call `.new`, and a
+    # substring check is far cheaper than running the regex over the output.
+    if ".new" in output:
+        output = _GENERIC_NEW_PATTERN.sub(r"\1<\2>(\3)", output)
 
     return output
 
 
+def _render(
+    out: TextIO,
+    graph: DependencyGraph,
+    dependency_modules: list[Path],
+    unique_imports: list[Import],
+) -> None:
+    """Write the bundled source for a renamed dependency graph to a text stream.
+
+    Lines are newline-separated with no trailing newline.
+
+    Args:
+        out: Text stream to write to.
+        graph: Resolved dependency graph with renamed ASTs.
+        dependency_modules: Paths of all non-entry modules, in topological order.
+        unique_imports: Deduplicated external imports to emit.
+    """
+
+    def write_line(line: str) -> None:
+        # The version annotation opens the output, so every later line
+        # starts with its separator
+        out.write("\n")
+        out.write(line)
+
+    # Version annotation
+    out.write(_get_version(graph.entry))
+
+    # Declaration (indicator/strategy) at top
+    declaration, entry_other = _extract_declaration(graph.entry)
+    if declaration:
+        write_line(unparse_single(declaration))
+
+    # External imports (deduplicated) - must come after indicator/strategy declaration
+    for imp in unique_imports:
+        import_str = f"import {imp.namespace}/{imp.name}/{imp.version}"
+        if imp.alias:
+            import_str += f" as {imp.alias}"
+        write_line(import_str)
+
+    write_line("")
+
+    # Bundled modules (in topological order, excluding entry)
+    if dependency_modules:
+        write_line("// --- Bundled modules ---")
+
+        for module_path in dependency_modules:
+            module = graph.modules[module_path]
+            write_line(f"// --- From: {module_path.name} ---")
+
+            # Skip external import statements (already emitted above)
+            unparsed = unparse_statements(
+                [stmt for stmt in module.ast.body if not _is_external_import(stmt)]
+            )
+            if unparsed.strip():  # Skip empty modules
+                write_line(unparsed)
+
+        write_line("")
+
+    # Entry module code (excluding declaration which is already at top)
+    write_line("// --- Main ---")
+    # Skip external import statements (already emitted above)
+    unparsed = unparse_statements(
+        [stmt for stmt in entry_other if not _is_external_import(stmt)]
+    )
+    if unparsed.strip():
+        write_line(unparsed)
+
+
 def bundle(config: PineconeConfig) -> BundleResult:
     """Bundle PineScript files into a single output.
 
     Pipeline:
     1. Resolve dependencies (build graph, topological sort)
-    2. Rename exported identifiers in each module
-    3. Rename imported references in each module
+    2. Build rename maps for each dependency module
+    3. Rename own identifiers and imported references (one walk per module)
     4. Merge ASTs in topological order
     5. Unparse to final output
 
@@ -181,22 +292,28 @@ def bundle(config: PineconeConfig) -> BundleResult:
         ParseError: If a file fails to parse.
     """
     # Step 1: Resolve all dependencies
-    graph = resolve_dependencies(config.entry, config.root_dir)
+    cache_dir = config.cache_dir if config.cache_enabled else None
+    graph = resolve_dependencies(config.entry, config.root_dir, cache_dir)
     entry_path = config.entry.resolve()
 
-    # Step 2: Build rename maps for all dependency modules (not entry)
+    # Step 2: Build rename maps for all dependency modules (not entry) and
+    # collect external imports from all modules, scanning each body once.
     # We rename ALL top-level identifiers to avoid collisions when bundled
     all_renames: dict[str, str] = {}
     module_renames: dict[Path, dict[str, str]] = {}
+    module_external_imports: list[list[Import]] = []
+    dependency_modules: list[Path] = []
 
     for module_path in graph.order:
+        module = graph.modules[module_path]
+        # Extract ALL top-level identifiers, not just exported ones
+        all_identifiers, external_imports = _analyze_module(module)
+        module_external_imports.append(external_imports)
+
         # Skip the entry module - its identifiers stay as-is
         if module_path == entry_path:
             continue
-
-        module = graph.modules[module_path]
-        # Extract ALL top-level identifiers, not just exported ones
-        all_identifiers = extract_top_level_identifiers(module.ast)
+        dependency_modules.append(module_path)
 
         if all_identifiers:
             renames = build_rename_map(
@@ -207,91 +324,29 @@ def bundle(config: PineconeConfig) -> BundleResult:
             module_renames[module_path] = renames
             all_renames.update(renames)
 
-    # Step 3: Rename all identifiers in each dependency module's AST
-    for module_path, renames in module_renames.items():
-        module = graph.modules[module_path]
-        renamer = IdentifierRenamer(renames)
-        renamer.visit(module.ast)
-
-    # Step 4: Rename imported references in all modules (including entry)
-    # This updates references to imported names to use their prefixed versions
+    # Step 3: Rename each module's own identifiers and its references to
+    # imported names in a single AST walk. Own identifiers take precedence,
+    # matching the previous order of renaming own names before imports.
     for module_path in graph.order:
         module = graph.modules[module_path]
         # Only rename references to imports this module uses
-        module_imports = {
-            name: path for imp in module.imports for name in imp.names for path in [imp.from_path]
-        }
+        module_import_names = {name for imp in module.imports for name in imp.names}
         # Filter all_renames to only include names this module imports
-        import_renames = {
-            name: all_renames[name] for name in module_imports if name in all_renames
-        }
-        if import_renames:
-            renamer = IdentifierRenamer(import_renames)
+        renames = {name: all_renames[name] for name in module_import_names & all_renames.keys()}
+        renames.update(module_renames.get(module_path, {}))
+        if renames:
+            renamer = IdentifierRenamer(renames)
             renamer.visit(module.ast)
 
-    # Step 5: Collect and deduplicate external imports from all modules
-    all_external_imports: list[Import] = []
-    for module_path in graph.order:
-        module = graph.modules[module_path]
-        all_external_imports.extend(_extract_external_imports(module))
-
-    unique_imports = _deduplicate_imports(all_external_imports)
+    # Step 4: Deduplicate external imports from all modules
+    unique_imports = _deduplicate_imports(chain.from_iterable(module_external_imports))
 
-    # Step 6: Build output
-    output_lines = []
+    # Step 5: Build output
+    buffer = io.StringIO()
+    _render(buffer, graph, dependency_modules, unique_imports)
+    output = buffer.getvalue()
 
-    # Version annotation
-    version = _get_version(graph.entry)
-    output_lines.append(version)
-
-    # Declaration (indicator/strategy) at top
-    declaration, entry_other = _extract_declaration(graph.entry)
-    if declaration:
-        output_lines.append(unparse_single(declaration))
-
-    # External imports (deduplicated) - must come after indicator/strategy declaration
-    if unique_imports:
-        for imp in unique_imports:
-            import_str = f"import {imp.namespace}/{imp.name}/{imp.version}"
-            if imp.alias:
-                import_str += f" as {imp.alias}"
-            output_lines.append(import_str)
-
-    output_lines.append("")
-
-    # Bundled modules (in topological order, excluding entry)
-    dependency_modules = [p for p in graph.order if p != entry_path]
-
-    if dependency_modules:
-        output_lines.append("// --- Bundled modules ---")
-
-        for module_path in dependency_modules:
-            module = graph.modules[module_path]
-            output_lines.append(f"// --- From: {module_path.name} ---")
-
-            for stmt in module.ast.body:
-                # Skip external import statements (already emitted above)
-                if _is_external_import(stmt):
-                    continue
-                unparsed = unparse_single(stmt)
-                if unparsed.strip():  # Skip empty lines
-                    output_lines.append(unparsed)
-
-        output_lines.append("")
-
-    # Entry module code (excluding declaration which is already at top)
-    output_lines.append("// --- Main ---")
-    for stmt in entry_other:
-        # Skip external import statements (already emitted above)
-        if _is_external_import(stmt):
-            continue
-        unparsed = unparse_single(stmt)
-        if unparsed.strip():
-            output_lines.append(unparsed)
-
-    output = "\n".join(output_lines)
-
-    # Step 7: Apply post-processing fixes
+    # Step 6: Apply post-processing fixes
     output = _postprocess_output(output)
 
     return BundleResult(
@@ -299,19 +354,26 @@ def bundle(config: PineconeConfig) -> BundleResult:
         modules_count=len(graph.modules),
         entry_path=config.entry,
         output_path=config.output,
+        module_sources={path: graph.modules[path].source for path in graph.order},
     )
 
 
 def write_bundle(result: BundleResult) -> None:
     """Write bundle result to output file.
 
-    Creates output directory if it doesn't exist.
+    Creates output directory if it doesn't exist. The bundle is encoded as
+    UTF-8 once, written to a temporary file next to the output and moved
+    into place, so readers (and the watcher) never see a partial bundle.
 
     Args:
         result: Bundle result to write.
     """
+    output_path = result.output_path
+
     # Create output directory if needed
-    result.output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Write output
-    result.output_path.write_text(result.output)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    tmp_path.write_bytes(result.output.encode("utf-8"))
+    os.replace(tmp_path, output_path)
@@ -6,7 +6,6 @@ from pathlib import Path
 import click
 
 from pinecone import __version__
-from pinecone.bundler import bundle, write_bundle
 from pinecone.config import load_config
 from pinecone.errors import PineconeError
 
@@ -79,6 +78,7 @@ def build(config: str | None, watch: bool, copy: bool) -> None:
 
 def _run_build(cfg: "PineconeConfig", copy: bool) -> None:
     """Run a single build."""
+    from pinecone.bundler import bundle, write_bundle
     from pinecone.config import PineconeConfig
 
     result = bundle(cfg)
@@ -104,6 +104,7 @@ def _copy_to_clipboard(content: str) -> None:
 
 def _run_watch_mode(cfg: "PineconeConfig", copy: bool) -> None:
     """Run in watch mode."""
+    from pinecone.bundler import bundle, write_bundle
     from pinecone.watcher import watch_and_rebuild
 
     click.echo(f"Watching for changes in {cfg.src_dir}...")
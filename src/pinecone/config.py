@@ -1,6 +1,9 @@
 """Configuration file loading and validation."""
 
+import hashlib
 import json
+import os
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -9,6 +12,25 @@ from pinecone.errors import ConfigError
 CONFIG_FILENAME = "pine.config.json"
 
 
+def user_cache_dir() -> Path:
+    """Get the per-user directory Pinecone keeps its caches in.
+
+    Follows each platform's convention: %LOCALAPPDATA% on Windows,
+    ~/Library/Caches on macOS and $XDG_CACHE_HOME (default ~/.cache)
+    elsewhere.
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", "")
+        # The XDG spec says to ignore relative paths
+        if not os.path.isabs(base):
+            base = Path.home() / ".cache"
+    return Path(base) / "pinecone"
+
+
 @dataclass
 class PineconeConfig:
     """Configuration for a Pinecone project."""
@@ -16,12 +38,24 @@ class PineconeConfig:
     entry: Path
     output: Path
     root_dir: Path
+    cache_enabled: bool = False
 
     @property
     def src_dir(self) -> Path:
         """Get the source directory (parent of entry file)."""
         return self.entry.parent
 
+    @property
+    def cache_dir(self) -> Path:
+        """Get the parse cache directory for this project.
+
+        It lives in the user's cache directory rather than the project tree:
+        cache entries are unpickled, so they must never come from files
+        checked into (or cloned along with) a project.
+        """
+        key = hashlib.blake2b(str(self.root_dir).encode(), digest_size=8).hexdigest()
+        return user_cache_dir() / key
+
 
 def load_config(config_path: Path | None = None) -> PineconeConfig:
     """Load and validate pine.config.json.
@@ -47,8 +81,7 @@ def load_config(config_path: Path | None = None) -> PineconeConfig:
 
     # Parse JSON
     try:
-        with open(config_path) as f:
-            data = json.load(f)
+        data = json.loads(config_path.read_bytes())
     except json.JSONDecodeError as e:
         raise ConfigError(
             f"Invalid JSON: {e.msg} at line {e.lineno}",
@@ -71,6 +104,10 @@ def load_config(config_path: Path | None = None) -> PineconeConfig:
             path=config_path,
         )
 
+    cache_enabled = data.get("cache", False)
+    if not isinstance(cache_enabled, bool):
+        raise ConfigError("'cache' must be true or false", path=config_path)
+
     # Resolve paths relative to config file location
     root_dir = config_path.parent.resolve()
     entry = (root_dir / data["entry"]).resolve()
@@ -93,4 +130,5 @@ def load_config(config_path: Path | None = None) -> PineconeConfig:
         entry=entry,
         output=output,
         root_dir=root_dir,
+        cache_enabled=cache_enabled,
     )
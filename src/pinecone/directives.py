@@ -4,7 +4,7 @@ import re
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ExportDirective:
     """Represents a // @export directive."""
 
@@ -12,7 +12,7 @@ class ExportDirective:
     line_number: int
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ImportDirective:
     """Represents a // @import directive."""
 
@@ -28,6 +28,64 @@ IMPORT_PATTERN = re.compile(
 )
 
 
+# A line break plus the comment marker opening the next line, inside an
+# import's braces when its name list spans several comment lines
+_CONTINUATION_PATTERN = re.compile(r"\n[ \t]*//")
+
+
+def _split_names(names_str: str) -> list[str]:
+    """Split a comma-separated directive name list, dropping empty entries."""
+    return [name.strip() for name in names_str.split(",") if name.strip()]
+
+
+def parse_directives(source: str) -> tuple[list[ExportDirective], list[ImportDirective]]:
+    """Extract all @export and @import directives from source in one pass.
+
+    Each pattern is matched against the whole source, so an import's name
+    list may span several comment lines. Line numbers (of the line where a
+    directive starts) are counted incrementally between matches rather than
+    from the start of the source for each one. Sources without either
+    keyword are not scanned at all.
+
+    Args:
+        source: PineScript source code.
+
+    Returns:
+        Tuple of (exports, imports) in source order.
+    """
+    exports = []
+    imports = []
+
+    if "@export" in source:
+        line_number, pos = 1, 0
+        for match in EXPORT_PATTERN.finditer(source):
+            start = match.start()
+            line_number += source.count("\n", pos, start)
+            pos = start
+            names = _split_names(match.group(1))
+            if names:
+                exports.append(ExportDirective(names=names, line_number=line_number))
+
+    if "@import" in source:
+        line_number, pos = 1, 0
+        for match in IMPORT_PATTERN.finditer(source):
+            start = match.start()
+            line_number += source.count("\n", pos, start)
+            pos = start
+            names = _split_names(_CONTINUATION_PATTERN.sub("", match.group(1)))
+            from_path = match.group(2)
+            if names and from_path:
+                imports.append(
+                    ImportDirective(
+                        names=names,
+                        from_path=from_path,
+                        line_number=line_number,
+                    )
+                )
+
+    return exports, imports
+
+
 def parse_exports(source: str) -> list[ExportDirective]:
     """Extract all @export directives from source with line numbers.
 
@@ -46,19 +104,7 @@ def parse_exports(source: str) -> list[ExportDirective]:
         >>> exports[0].names
         ['foo', 'bar']
     """
-    exports = []
-
-    for match in EXPORT_PATTERN.finditer(source):
-        # Calculate line number (1-indexed)
-        line_number = source[: match.start()].count("\n") + 1
-
-        # Parse comma-separated names
-        names_str = match.group(1)
-        names = [name.strip() for name in names_str.split(",") if name.strip()]
-
-        if names:
-            exports.append(ExportDirective(names=names, line_number=line_number))
-
+    exports, _ = parse_directives(source)
     return exports
 
 
@@ -82,28 +128,7 @@ def parse_imports(source: str) -> list[ImportDirective]:
         >>> imports[0].from_path
         './utils.pine'
     """
-    imports = []
-
-    for match in IMPORT_PATTERN.finditer(source):
-        # Calculate line number (1-indexed)
-        line_number = source[: match.start()].count("\n") + 1
-
-        # Parse comma-separated names
-        names_str = match.group(1)
-        names = [name.strip() for name in names_str.split(",") if name.strip()]
-
-        # Get the import path
-        from_path = match.group(2)
-
-        if names and from_path:
-            imports.append(
-                ImportDirective(
-                    names=names,
-                    from_path=from_path,
-                    line_number=line_number,
-                )
-            )
-
+    _, imports = parse_directives(source)
     return imports
 
 
@@ -1,5 +1,6 @@
 """Custom exceptions for Pinecone bundler."""
 
+import os
 from pathlib import Path
 
 
@@ -57,13 +58,36 @@ class ModuleNotFoundError(PineconeError):
         from_file: Path,
         from_line: int,
         available: list[str] | None = None,
+        search_dir: Path | None = None,
     ) -> None:
         self.import_path = import_path
         self.from_file = from_file
         self.from_line = from_line
-        self.available = available or []
+        self.search_dir = search_dir
+        self._available = available
         super().__init__(f"Cannot find module '{import_path}'")
 
+    @property
+    def available(self) -> list[str]:
+        """Get the .pine files next to the missing module.
+
+        When only `search_dir` was given, the directory is listed on first
+        access, so errors that are caught and never shown don't pay for it.
+        """
+        if self._available is None:
+            self._available = []
+            if self.search_dir is not None:
+                try:
+                    with os.scandir(self.search_dir) as entries:
+                        self._available = [
+                            entry.name
+                            for entry in entries
+                            if entry.name.endswith(".pine")
+                        ]
+                except OSError:
+                    pass
+        return self._available
+
     def __str__(self) -> str:
         lines = [
             f"Cannot find module \"{self.import_path}\"",
@@ -1,15 +1,20 @@
 """AST identifier renaming for namespace isolation."""
 
+import functools
+import sys
+from collections.abc import Mapping
 from pathlib import Path
 from typing import Any
 
-from pynescript.ast import Assign, FunctionDef, Name, NodeTransformer, Tuple
+from pynescript.ast import AST, Assign, FunctionDef, Name, Tuple
 
 
+@functools.lru_cache(maxsize=1024)
 def path_to_prefix(path: Path, root_dir: Path) -> str:
     """Convert file path to namespace prefix.
 
-    Removes root_dir prefix, src/ prefix, and .pine extension.
+    Removes root_dir prefix, src/ prefix, and .pine extension. Results are
+    memoized since the same paths recur on every rebuild in watch mode.
 
     Args:
         path: Absolute path to the .pine file.
@@ -46,11 +51,59 @@ def path_to_prefix(path: Path, root_dir: Path) -> str:
     return "__" + "_".join(parts) + "__"
 
 
-class IdentifierRenamer(NodeTransformer):
+def rename_tree(node: Any, renames: Mapping[str, str]) -> None:
+    """Rename identifiers in an AST subtree in place.
+
+    Renames Name references/declarations (including assignment and tuple
+    unpacking targets) and function definition names. Method definitions
+    keep their name since methods are called via dot notation and don't
+    collide in the global namespace; their bodies are still renamed.
+
+    This is a hand-written iterative walk rather than a NodeTransformer: it
+    checks the two node types it cares about directly and descends through
+    `_fields`, avoiding per-node `visit_<ClassName>` lookups, recursion and
+    list rebuilding.
+
+    Args:
+        node: Root AST node to rename within.
+        renames: Mapping from old names to new names.
+    """
+    # Bound once for the whole walk rather than looked up at every Name
+    get = renames.get
+    # Explicit stack instead of recursion: no frame per node, no depth limit
+    stack = [node]
+    pop = stack.pop
+    push = stack.append
+
+    while stack:
+        node = pop()
+        node_type = type(node)
+        if node_type is Name:
+            new_name = get(node.id)
+            if new_name is not None:
+                node.id = new_name
+            # Name has no child nodes besides its context
+            continue
+        if node_type is FunctionDef and not node.method:
+            new_name = get(node.name)
+            if new_name is not None:
+                node.name = new_name
+
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                for child in value:
+                    if isinstance(child, AST):
+                        push(child)
+            elif isinstance(value, AST):
+                push(value)
+
+
+class IdentifierRenamer:
     """Rename identifiers in AST.
 
     Renames function definitions, variable declarations, and their references
-    based on a rename map.
+    based on a rename map. See rename_tree() for the exact rules.
     """
 
     def __init__(self, renames: dict[str, str]) -> None:
@@ -60,50 +113,52 @@ class IdentifierRenamer(NodeTransformer):
             renames: Mapping from old names to new names.
         """
         self.renames = renames
-        super().__init__()
 
-    def visit_FunctionDef(self, node: FunctionDef) -> FunctionDef:
-        """Rename function definitions.
+    def visit(self, node: Any) -> Any:
+        """Rename identifiers in the given tree in place.
 
-        Skips method definitions (node.method is truthy) since methods are
-        called via dot notation and don't collide in the global namespace.
+        Args:
+            node: Root AST node (usually a Script).
+
+        Returns:
+            The same node, for call-site compatibility with NodeTransformer.
         """
-        # Skip methods - they're called via dot notation (obj.method())
-        # and don't need renaming to avoid collisions
-        if node.method:
-            self.generic_visit(node)
-            return node
-
-        if node.name in self.renames:
-            node.name = self.renames[node.name]
-        # Continue visiting children (for nested functions, etc.)
-        self.generic_visit(node)
+        # Nothing can change, so skip walking the tree entirely
+        if self.renames:
+            rename_tree(node, self.renames)
         return node
 
-    def visit_Assign(self, node: Assign) -> Assign:
-        """Rename variable declarations in assignment statements."""
-        self._rename_target(node.target)
-        # Continue visiting children (the value expression)
-        self.generic_visit(node)
-        return node
 
-    def _rename_target(self, target: Any) -> None:
-        """Rename an assignment target (handles both single names and tuples)."""
-        if isinstance(target, Name) and target.id in self.renames:
-            target.id = self.renames[target.id]
-        elif isinstance(target, Tuple):
-            # Handle tuple unpacking: [a, b] = ...
-            for elt in target.elts:
-                self._rename_target(elt)
-
-    def visit_Name(self, node: Name) -> Name:
-        """Rename name references and declarations."""
-        if node.id in self.renames:
-            node.id = self.renames[node.id]
-        return node
+def extract_statement_identifiers(stmt: Any) -> list[str]:
+    """Extract the identifier names a single top-level statement defines.
 
+    Args:
+        stmt: A top-level AST statement node.
+
+    Returns:
+        Names declared by the statement (empty for non-declarations).
+    """
+    if isinstance(stmt, Assign):
+        identifiers: list[str] = []
+
+        def extract_from_target(target: Any) -> None:
+            """Extract names from an assignment target."""
+            if isinstance(target, Name):
+                identifiers.append(target.id)
+            elif isinstance(target, Tuple):
+                for elt in target.elts:
+                    extract_from_target(elt)
+
+        extract_from_target(stmt.target)
+        return identifiers
+    if isinstance(stmt, FunctionDef):
+        # Skip methods - they're called via dot notation (obj.method())
+        if not stmt.method:
+            return [stmt.name]
+    return []
 
-def extract_top_level_identifiers(ast: Any) -> list[str]:
+
+def extract_top_level_identifiers(ast: Any) -> frozenset[str]:
     """Extract all top-level identifier names from a module AST.
 
     This includes:
@@ -118,27 +173,11 @@ def extract_top_level_identifiers(ast: Any) -> list[str]:
         ast: The parsed module AST (Script node).
 
     Returns:
-        List of identifier names defined at the top level.
+        Set of identifier names defined at the top level.
     """
-    identifiers = []
-
-    def extract_from_target(target: Any) -> None:
-        """Extract names from an assignment target."""
-        if isinstance(target, Name):
-            identifiers.append(target.id)
-        elif isinstance(target, Tuple):
-            for elt in target.elts:
-                extract_from_target(elt)
-
-    for stmt in ast.body:
-        if isinstance(stmt, Assign):
-            extract_from_target(stmt.target)
-        elif isinstance(stmt, FunctionDef):
-            # Skip methods - they're called via dot notation (obj.method())
-            if not stmt.method:
-                identifiers.append(stmt.name)
-
-    return identifiers
+    return frozenset(
+        name for stmt in ast.body for name in extract_statement_identifiers(stmt)
+    )
 
 
 def build_rename_map(
@@ -154,11 +193,14 @@ def build_rename_map(
         root_dir: Project root directory.
 
     Returns:
-        Dict mapping original names to prefixed names.
+        Dict mapping original names to prefixed names. All strings are
+        interned, so every renamed node shares one object per new name and
+        lookups can short-circuit on identity.
 
     Example:
         >>> build_rename_map(['foo', 'bar'], Path('/project/src/utils.pine'), Path('/project'))
         {'foo': '__utils__foo', 'bar': '__utils__bar'}
     """
     prefix = path_to_prefix(module_path, root_dir)
-    return {name: prefix + name for name in names}
+    intern = sys.intern
+    return {intern(name): intern(prefix + name) for name in names}
@@ -1,6 +1,13 @@
 """Dependency resolution and graph building."""
 
+import functools
+import hashlib
+import os
+import pickle
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
+from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
 from typing import Any
 
@@ -9,8 +16,7 @@ from pynescript.ast import parse
 from pinecone.directives import (
     ExportDirective,
     ImportDirective,
-    parse_exports,
-    parse_imports,
+    parse_directives,
 )
 from pinecone.errors import (
     CircularDependencyError,
@@ -19,8 +25,15 @@ from pinecone.errors import (
     ParseError,
 )
 
+# Bump when the pickled Module layout changes to invalidate old cache entries
+_CACHE_FORMAT = 4
 
-@dataclass
+# In-process cache of parsed modules: resolved path -> (st_mtime_ns, st_size,
+# pickled Module). Lets watch-mode rebuilds reparse only the files that changed.
+_MODULE_CACHE: dict[Path, tuple[int, int, bytes]] = {}
+
+
+@dataclass(slots=True)
 class Module:
     """A parsed PineScript module."""
 
@@ -29,6 +42,11 @@ class Module:
     ast: Any  # pynescript Script node
     exports: list[ExportDirective]
     imports: list[ImportDirective]
+    # Set of exported names for import validation (slots rule out cached_property)
+    exported_name_set: frozenset[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.exported_name_set = frozenset(self.exported_names)
 
     @property
     def exported_names(self) -> list[str]:
@@ -45,53 +63,228 @@ class DependencyGraph:
     order: list[Path] = field(default_factory=list)
 
 
-def parse_module(path: Path) -> Module:
-    """Parse a PineScript file into a Module.
+def _file_signature(path: Path) -> tuple[int, int]:
+    """Get the (modification time, size) pair identifying a file's contents."""
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def invalidate(path: Path) -> None:
+    """Drop a file from the in-process module cache.
+
+    The cache already notices edits through the file's modification time and
+    size; this is for callers such as the watcher that know a file changed
+    and don't want to rely on timestamp granularity.
 
     Args:
         path: Path to the .pine file.
+    """
+    _MODULE_CACHE.pop(path.resolve(), None)
 
-    Returns:
-        Parsed Module object.
 
-    Raises:
-        ParseError: If pynescript fails to parse the file.
+@functools.cache
+def _parser_version() -> str:
+    """Get the installed pynescript version, which shapes the cached ASTs."""
+    try:
+        return version("pynescript")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def _cache_file(path: Path, cache_dir: Path) -> Path:
+    """Get the cache file for a module.
+
+    There is one file per module path, overwritten on every reparse, so the
+    cache doesn't grow as files are edited. What the entry was parsed from
+    is recorded inside it (see _cache_header).
+    """
+    key = hashlib.blake2b(str(path).encode(), digest_size=8).hexdigest()
+    return cache_dir / f"{key}.pkl"
+
+
+def _cache_header(signature: tuple[int, int]) -> tuple[int, str, int, int]:
+    """Get the header identifying a cache entry: format, parser and file state."""
+    return (_CACHE_FORMAT, _parser_version(), *signature)
+
+
+def _load_cached_module(
+    path: Path, signature: tuple[int, int], cache_dir: Path | None
+) -> Module | None:
+    """Load a module from the in-process cache, then the on-disk cache.
+
+    Every hit unpickles a fresh Module, since bundling renames ASTs in place.
+    Unreadable on-disk entries are treated as a cache miss.
+    """
+    entry = _MODULE_CACHE.get(path)
+    if entry is not None and entry[:2] == signature:
+        return pickle.loads(entry[2])
+
+    if cache_dir is None:
+        return None
+    try:
+        header, data = pickle.loads(_cache_file(path, cache_dir).read_bytes())
+        if header != _cache_header(signature):
+            # Parsed from an older version of the file, or by another parser
+            return None
+        module = pickle.loads(data)
+    except Exception:
+        # Corrupt or incompatible entries can fail in many ways; just reparse
+        return None
+    if not isinstance(module, Module):
+        return None
+    _MODULE_CACHE[path] = (*signature, data)
+    return module
+
+
+def _store_cached_module(
+    module: Module, signature: tuple[int, int], cache_dir: Path | None
+) -> None:
+    """Add a freshly parsed Module to the caches.
+
+    The on-disk entry replaces the module's previous one atomically. Failures
+    writing it are ignored (that cache is optional).
     """
+    data = pickle.dumps(module, protocol=pickle.HIGHEST_PROTOCOL)
+    _MODULE_CACHE[module.path] = (*signature, data)
+
+    if cache_dir is None:
+        return
+    entry = pickle.dumps(
+        (_cache_header(signature), data), protocol=pickle.HIGHEST_PROTOCOL
+    )
+    cache_file = _cache_file(module.path, cache_dir)
+    # Per-process temporary name, in case two builds share the cache directory
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    try:
+        # Private to the user: entries are unpickled when loaded
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp_file.write_bytes(entry)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def _read_module(path: Path) -> Module:
+    """Read a module's source and directives, leaving its AST unparsed."""
     source = path.read_text()
 
     # Parse directives from raw source (before pynescript strips comments)
-    exports = parse_exports(source)
-    imports = parse_imports(source)
+    exports, imports = parse_directives(source)
 
-    # Parse AST with pynescript
+    return Module(
+        path=path,
+        source=source,
+        ast=None,
+        exports=exports,
+        imports=imports,
+    )
+
+
+def _parse_ast(module: Module) -> Any:
+    """Parse a module's source into a pynescript AST.
+
+    Raises:
+        ParseError: If pynescript fails to parse the source.
+    """
     try:
-        ast = parse(source)
+        return parse(module.source)
     except Exception as e:
         # Try to extract line number from pynescript error
         raise ParseError(
             message=str(e),
-            path=path,
+            path=module.path,
             line=None,
         )
 
-    return Module(
-        path=path,
-        source=source,
-        ast=ast,
-        exports=exports,
-        imports=imports,
-    )
+
+def parse_module(path: Path, cache_dir: Path | None = None) -> Module:
+    """Parse a PineScript file into a Module.
+
+    Parsed modules are kept in an in-process cache, so unchanged files are
+    only parsed once per process (e.g. across watch-mode rebuilds).
+
+    Args:
+        path: Path to the .pine file.
+        cache_dir: Optional directory for the on-disk parse cache. When set,
+            unchanged files are loaded from the cache instead of being reparsed.
+
+    Returns:
+        Parsed Module object.
+
+    Raises:
+        ParseError: If pynescript fails to parse the file.
+    """
+    signature = _file_signature(path)
+    cached = _load_cached_module(path, signature, cache_dir)
+    if cached is not None:
+        return cached
+
+    module = _read_module(path)
+    module.ast = _parse_ast(module)
+    _store_cached_module(module, signature, cache_dir)
+
+    return module
 
 
-def resolve_dependencies(entry_path: Path, root_dir: Path) -> DependencyGraph:
+def _parse_pending(
+    modules: list[Module],
+    signatures: dict[Path, tuple[int, int]],
+    cache_dir: Path | None,
+) -> None:
+    """Parse the ASTs of modules discovered without one.
+
+    Parsing is serial: pynescript's pure-Python ANTLR runtime holds the GIL
+    throughout, so threads only add contention (and slow the warm-up of
+    ANTLR's shared, unsynchronized DFA cache on cold builds).
+
+    Args:
+        modules: Modules whose `ast` is still None, in topological order.
+        signatures: File signature of each module when it was read, used to
+            key the parse caches.
+        cache_dir: Optional directory for the on-disk parse cache.
+
+    Raises:
+        ParseError: If a module fails to parse.
+    """
+    for module in modules:
+        module.ast = _parse_ast(module)
+        _store_cached_module(module, signatures[module.path], cache_dir)
+
+
+def _load_module(
+    path: Path, cache_dir: Path | None
+) -> tuple[Module, tuple[int, int] | None]:
+    """Load a module from the parse caches, or read it with its AST deferred.
+
+    Returns:
+        Tuple of (module, signature). The signature is None for cached
+        modules, otherwise it is the file signature to cache the parsed
+        module under.
+    """
+    signature = _file_signature(path)
+    module = _load_cached_module(path, signature, cache_dir)
+    if module is not None:
+        return module, None
+    return _read_module(path), signature
+
+
+def resolve_dependencies(
+    entry_path: Path,
+    root_dir: Path,
+    cache_dir: Path | None = None,
+) -> DependencyGraph:
     """Build complete dependency graph starting from entry point.
 
-    Uses DFS to discover all dependencies, detects cycles, and produces
-    a topologically sorted order for bundling.
+    Uses DFS over the @import directives to discover all dependencies,
+    detect cycles, and produce a topologically sorted order for bundling.
+    A module's imports are read in the background as soon as it is entered.
+    Only once the graph is known are the module ASTs parsed, skipping any
+    that were loaded from the parse cache.
 
     Args:
         entry_path: Path to the entry point .pine file.
         root_dir: Project root directory for resolving relative imports.
+        cache_dir: Optional directory for the on-disk parse cache.
 
     Returns:
         DependencyGraph with all modules and their topological order.
@@ -102,94 +295,149 @@ def resolve_dependencies(entry_path: Path, root_dir: Path) -> DependencyGraph:
         CircularDependencyError: If circular imports are detected.
         ParseError: If a file fails to parse.
     """
+    # The walk keys modules by their resolved path as a plain string, using
+    # os.path; Path objects are only built once per module and for errors.
+
     # Track modules we've fully processed
-    visited: set[Path] = set()
-    # Track modules we're currently visiting (for cycle detection)
-    visiting: set[Path] = set()
+    visited: set[str] = set()
+    # Track modules we're currently visiting (for cycle detection), mapped to
+    # their position in the DFS stack
+    visiting: dict[str, int] = {}
     # Store parsed modules
-    modules: dict[Path, Module] = {}
+    modules: dict[str, Module] = {}
     # Topological order (dependencies before dependents)
-    order: list[Path] = []
-    # Track the path for cycle error messages
-    path_stack: list[Path] = []
-
-    def visit(module_path: Path, from_file: Path | None = None, from_line: int = 0) -> None:
-        """DFS visit a module and its dependencies."""
-        # Resolve to absolute path
-        module_path = module_path.resolve()
-
+    order: list[str] = []
+    # File signature of each module read from disk, for caching once parsed
+    signatures: dict[Path, tuple[int, int]] = {}
+    # Explicit DFS stack of (module key, remaining (import, resolved key)
+    # pairs, import that led here). Iterating avoids recursion limits on deep
+    # import chains.
+    stack: list[
+        tuple[str, Iterator[tuple[ImportDirective, str]], ImportDirective | None]
+    ] = []
+    # Resolved path per joined import path: sibling modules importing the same
+    # file share one realpath call (kept per call, so symlink edits are seen)
+    realpaths: dict[str, str] = {}
+    # Background loads of modules that have been imported but not yet entered
+    prefetched: dict[str, Future[tuple[Module, tuple[int, int] | None]]] = {}
+    executor = ThreadPoolExecutor()
+
+    def enter(
+        key: str,
+        via: ImportDirective | None = None,
+        from_key: str | None = None,
+    ) -> bool:
+        """Start visiting a module. Returns False if it was already visited."""
         # Check for cycles
-        if module_path in visiting:
-            # Find where the cycle starts in the stack
-            cycle_start = path_stack.index(module_path)
-            cycle = path_stack[cycle_start:] + [module_path]
-            raise CircularDependencyError(cycle)
+        cycle_start = visiting.get(key)
+        if cycle_start is not None:
+            members = [frame[0] for frame in stack[cycle_start:]]
+            # Start from the smallest path, so a cycle is reported the same
+            # way whichever of its modules the walk reached first
+            first = members.index(min(members))
+            members = members[first:] + members[:first]
+            raise CircularDependencyError([Path(k) for k in members + members[:1]])
 
         # Skip if already processed
-        if module_path in visited:
-            return
+        if key in visited:
+            return False
 
         # Check file exists
-        if not module_path.exists():
-            available = []
-            if module_path.parent.exists():
-                available = [
-                    f.name
-                    for f in module_path.parent.iterdir()
-                    if f.suffix == ".pine"
-                ]
+        if not os.path.exists(key):
+            module_path = Path(key)
             raise ModuleNotFoundError(
                 import_path=str(module_path.relative_to(root_dir)),
-                from_file=from_file or module_path,
-                from_line=from_line,
-                available=available,
+                from_file=modules[from_key].path if from_key else module_path,
+                from_line=via.line_number if via else 0,
+                search_dir=module_path.parent,
             )
 
-        # Mark as visiting
-        visiting.add(module_path)
-        path_stack.append(module_path)
-
-        # Parse the module
-        module = parse_module(module_path)
-        modules[module_path] = module
-
-        # Process imports (visit dependencies first)
+        # Load the module from the cache, or read its directives and defer
+        # parsing the AST until the whole graph is known
+        future = prefetched.pop(key, None)
+        if future is not None:
+            module, signature = future.result()
+        else:
+            module, signature = _load_module(Path(key), cache_dir)
+        if signature is not None:
+            signatures[module.path] = signature
+        modules[key] = module
+
+        # Resolve import paths relative to this module and start loading the
+        # ones not seen yet while their earlier siblings are visited
+        module_dir = os.path.dirname(key)
+        deps = []
         for imp in module.imports:
-            # Resolve import path relative to current module
-            import_path = (module_path.parent / imp.from_path).resolve()
-
-            # Visit the dependency
-            visit(import_path, from_file=module_path, from_line=imp.line_number)
-
-            # Validate that imported names are actually exported
-            dep_module = modules.get(import_path)
-            if dep_module:
-                for name in imp.names:
-                    if name not in dep_module.exported_names:
-                        raise ExportNotFoundError(
-                            name=name,
-                            module_path=import_path,
-                            from_file=module_path,
-                            from_line=imp.line_number,
-                            available_exports=dep_module.exported_names,
-                        )
-
-        # Done visiting this module
-        visiting.remove(module_path)
-        path_stack.pop()
-        visited.add(module_path)
-
-        # Add to order (dependencies come before this module)
-        order.append(module_path)
-
-    # Start from entry point
-    visit(entry_path)
-
-    # Entry module
-    entry_module = modules[entry_path.resolve()]
+            joined = os.path.join(module_dir, imp.from_path)
+            import_key = realpaths.get(joined)
+            if import_key is None:
+                import_key = realpaths[joined] = os.path.realpath(joined)
+            deps.append((imp, import_key))
+        for _, import_key in deps:
+            if import_key not in modules and import_key not in prefetched:
+                prefetched[import_key] = executor.submit(
+                    _load_module, Path(import_key), cache_dir
+                )
+
+        # Mark as visiting
+        visiting[key] = len(stack)
+        stack.append((key, iter(deps), via))
+        return True
+
+    def check_exported(imp: ImportDirective, import_key: str, from_key: str) -> None:
+        """Validate that imported names are actually exported."""
+        dep_module = modules[import_key]
+        for name in imp.names:
+            if name not in dep_module.exported_name_set:
+                raise ExportNotFoundError(
+                    name=name,
+                    module_path=dep_module.path,
+                    from_file=modules[from_key].path,
+                    from_line=imp.line_number,
+                    available_exports=dep_module.exported_names,
+                )
+
+    entry_key = os.path.realpath(entry_path)
+    try:
+        # Start from entry point
+        enter(entry_key)
+
+        while stack:
+            key, deps, via = stack[-1]
+
+            # Process imports (visit dependencies first)
+            dep = next(deps, None)
+            if dep is not None:
+                imp, import_key = dep
+                if not enter(import_key, imp, key):
+                    check_exported(imp, import_key, key)
+                continue
+
+            # Done visiting this module
+            stack.pop()
+            del visiting[key]
+            visited.add(key)
+
+            # Add to order (dependencies come before this module)
+            order.append(key)
+
+            # Now the dependency is complete, validate the import that reached it
+            if via is not None:
+                check_exported(via, key, stack[-1][0])
+    finally:
+        # Loads left over after an error are no longer needed
+        executor.shutdown(cancel_futures=True)
+
+    # Parse every module that wasn't served from the cache
+    ordered = [modules[key] for key in order]
+    _parse_pending(
+        [module for module in ordered if module.ast is None],
+        signatures,
+        cache_dir,
+    )
 
     return DependencyGraph(
-        entry=entry_module,
-        modules=modules,
-        order=order,
+        entry=modules[entry_key],
+        modules={module.path: module for module in ordered},
+        order=[module.path for module in ordered],
     )
@@ -1,8 +1,11 @@
 """File system watcher for automatic rebuilds."""
 
-import time
+import hashlib
+import os
+import sys
+import traceback
 from pathlib import Path
-from threading import Timer
+from threading import Event, Thread
 from typing import Callable
 
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
@@ -10,6 +13,25 @@ from watchdog.observers import Observer
 
 from pinecone.bundler import BundleResult, bundle, write_bundle
 from pinecone.config import PineconeConfig
+from pinecone.resolver import invalidate
+
+
+def _source_digest(source: str) -> bytes:
+    """Hash a module's source text."""
+    return hashlib.blake2b(source.encode(), digest_size=16).digest()
+
+
+def _file_digest(path: str) -> bytes | None:
+    """Hash a file's source text, or return None if it can't be read.
+
+    The file is decoded the way the resolver reads modules, so an unchanged
+    file matches the digest of the source it was bundled from.
+    """
+    try:
+        with open(path) as f:
+            return _source_digest(f.read())
+    except (OSError, ValueError):
+        return None
 
 
 class PineFileHandler(FileSystemEventHandler):
@@ -26,7 +48,20 @@ class PineFileHandler(FileSystemEventHandler):
         self.on_success = on_success
         self.on_error = on_error
         self.debounce_seconds = debounce_seconds
-        self._timer: Timer | None = None
+        # Event paths are filtered as strings: the watched root and the config
+        # paths are already resolved, so ignored events need no Path or
+        # resolve(). Only handled events pay for one, in invalidate().
+        self._output_paths = {str(config.output), str(config.output.resolve())}
+        # Content digest of each module in the last successful bundle; None
+        # until one succeeds, or after a failed build (the broken graph may
+        # include other files)
+        self._module_digests: dict[str, bytes | None] | None = None
+        # Set by events; a single worker thread waits on it and rebuilds
+        self._wake = Event()
+        # Set (before waking the worker) to make it exit; see stop()
+        self._stopping = False
+        self._worker = Thread(target=self._run, name="pinecone-rebuild", daemon=True)
+        self._worker.start()
         super().__init__()
 
     def _should_handle(self, event: FileSystemEvent) -> bool:
@@ -34,51 +69,121 @@ class PineFileHandler(FileSystemEventHandler):
         if event.is_directory:
             return False
 
-        path = Path(event.src_path)
+        src_path = event.src_path
 
         # Only handle .pine files
-        if path.suffix != ".pine":
+        if not src_path.endswith(".pine"):
             return False
 
         # Ignore output file
-        if path.resolve() == self.config.output.resolve():
+        if src_path in self._output_paths:
             return False
 
         return True
 
     def _do_rebuild(self) -> None:
-        """Execute the rebuild."""
+        """Execute the rebuild, unless no bundled file's content changed.
+
+        Saves that don't change a file (touch, editor atomic writes,
+        formatters with nothing to do) still fire events; comparing content
+        digests against the last successful build skips those entirely.
+        """
+        if self._module_digests is not None:
+            digests = {path: _file_digest(path) for path in self._module_digests}
+            if digests == self._module_digests:
+                return
+
         try:
             result = bundle(self.config)
             write_bundle(result)
+            # Digest the sources the bundle was built from, not the files now
+            # on disk, so a save that lands mid-build still rebuilds next time
+            self._module_digests = {
+                str(path): _source_digest(source)
+                for path, source in result.module_sources.items()
+            }
             self.on_success(result)
         except Exception as e:
+            self._module_digests = None
             self.on_error(e)
 
+    def _run(self) -> None:
+        """Rebuild once events have stopped arriving for the debounce delay."""
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            # Every event during the quiet period starts it over, so a burst
+            # of events (e.g. an editor's save or a git checkout) builds once
+            while not self._stopping and self._wake.wait(self.debounce_seconds):
+                self._wake.clear()
+            if self._stopping:
+                return
+            try:
+                self._do_rebuild()
+            except Exception:
+                # Only a failing on_error callback gets here; report it and
+                # keep the worker alive for the next change
+                traceback.print_exc()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the rebuild worker thread.
+
+        A rebuild that is already running finishes first, so the bundle and
+        parse cache aren't left half-written; one still waiting out the
+        debounce delay is dropped.
+
+        Args:
+            timeout: Maximum seconds to wait for the worker, or None to wait
+                until it exits.
+        """
+        self._stopping = True
+        self._wake.set()
+        self._worker.join(timeout)
+
     def _schedule_rebuild(self) -> None:
         """Schedule a rebuild with debouncing."""
-        # Cancel any pending rebuild
-        if self._timer is not None:
-            self._timer.cancel()
-
-        # Schedule new rebuild
-        self._timer = Timer(self.debounce_seconds, self._do_rebuild)
-        self._timer.start()
+        self._wake.set()
+
+    def _handle_change(self, event: FileSystemEvent) -> None:
+        """Forget the changed file's parsed module and schedule a rebuild.
+
+        Unchanged modules stay in the resolver's in-process cache, so the
+        rebuild only reparses what changed. Dropping the entry explicitly
+        covers edits that don't visibly change the file's mtime or size.
+        """
+        invalidate(Path(event.src_path))
+        self._schedule_rebuild()
+
+    def _is_bundled(self, event: FileSystemEvent) -> bool:
+        """Check if the event's file was part of the last successful bundle."""
+        if self._module_digests is None:
+            return True
+        src_path = event.src_path
+        # Only resolve (e.g. for paths through a symlink) when the string misses
+        return (
+            src_path in self._module_digests
+            or os.path.realpath(src_path) in self._module_digests
+        )
 
     def on_modified(self, event: FileSystemEvent) -> None:
-        """Handle file modification."""
-        if self._should_handle(event):
-            self._schedule_rebuild()
+        """Handle file modification.
+
+        Edits to .pine files outside the dependency graph can't change the
+        bundle, so they are ignored. Creations and deletions always rebuild,
+        since they may complete or break an import.
+        """
+        if self._should_handle(event) and self._is_bundled(event):
+            self._handle_change(event)
 
     def on_created(self, event: FileSystemEvent) -> None:
         """Handle file creation."""
         if self._should_handle(event):
-            self._schedule_rebuild()
+            self._handle_change(event)
 
     def on_deleted(self, event: FileSystemEvent) -> None:
         """Handle file deletion."""
         if self._should_handle(event):
-            self._schedule_rebuild()
+            self._handle_change(event)
 
 
 def watch_and_rebuild(
@@ -104,9 +209,15 @@ def watch_and_rebuild(
     observer.start()
 
     try:
-        while True:
-            time.sleep(1)
+        # Block on the observer instead of polling. Windows can't interrupt a
+        # blocking join with Ctrl+C, so it still wakes once a second there.
+        timeout = 1 if sys.platform == "win32" else None
+        while observer.is_alive():
+            observer.join(timeout)
     except KeyboardInterrupt:
+        pass
+    finally:
+        # Stop delivering events first, then let any running rebuild finish
         observer.stop()
-
-    observer.join()
+        observer.join()
+        handler.stop()
@@ -0,0 +1,67 @@
+"""Shared pytest fixtures."""
+
+import functools
+import hashlib
+import os
+import pickle
+from collections.abc import Callable, Iterator
+from importlib.metadata import version
+from typing import Any
+
+import pytest
+from pynescript.ast import parse
+
+from pinecone.resolver import _MODULE_CACHE
+
+
+@pytest.fixture(autouse=True)
+def clear_module_cache() -> Iterator[None]:
+    """Keep the resolver's in-process module cache from leaking between tests."""
+    _MODULE_CACHE.clear()
+    yield
+    _MODULE_CACHE.clear()
+
+
+@pytest.fixture(scope="session")
+def parse_cached(request: pytest.FixtureRequest) -> Callable[[str], Any]:
+    """Parse PineScript source, running the parser once per distinct source.
+
+    Parsed trees are also kept under pytest's cache directory
+    (.pytest_cache/), so reruns skip the parser entirely. Each call returns
+    a freshly unpickled AST, so tests that rename in place don't affect one
+    another.
+    """
+    cache = getattr(request.config, "cache", None)
+    ast_dir = cache.mkdir("ast") if cache is not None else None
+    # Trees pickled by another pynescript version may not load the same way
+    pynescript_version = version("pynescript")
+
+    @functools.lru_cache(maxsize=None)
+    def parse_pickled(source: str) -> bytes:
+        key = hashlib.blake2b(
+            f"{pynescript_version}|{source}".encode(), digest_size=16
+        ).hexdigest()
+        if ast_dir is not None:
+            try:
+                data = (ast_dir / key).read_bytes()
+                pickle.loads(data)
+                return data
+            except Exception:
+                # Missing, or left truncated by an interrupted run: reparse
+                pass
+
+        data = pickle.dumps(parse(source), protocol=pickle.HIGHEST_PROTOCOL)
+        if ast_dir is not None:
+            # Atomic, so parallel workers never read a half-written entry
+            tmp_file = ast_dir / f"{key}.{os.getpid()}.tmp"
+            try:
+                tmp_file.write_bytes(data)
+                os.replace(tmp_file, ast_dir / key)
+            except OSError:
+                pass
+        return data
+
+    def parse_copy(source: str) -> Any:
+        return pickle.loads(parse_pickled(source))
+
+    return parse_copy
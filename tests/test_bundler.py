@@ -4,13 +4,20 @@ import pytest
 from pathlib import Path
 
 from pinecone.bundler import (
+    BundleResult,
     bundle,
+    write_bundle,
     _postprocess_output,
+    _analyze_module,
     _deduplicate_imports,
-    _extract_external_imports,
+    _extract_declaration,
+    _strip_version_lines,
+    unparse_single,
+    unparse_statements,
 )
 from pinecone.config import load_config
 from pinecone.errors import CircularDependencyError
+from pinecone.resolver import parse_module
 
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
@@ -52,6 +59,17 @@ class TestBundlerIntegration:
         # Check nested reference is updated (format uses math's double)
         assert "__utils_math__double(x)" in result.output
 
+    def test_bundle_reports_module_sources(self) -> None:
+        """Test that the result has the source of every module in the bundle."""
+        config = load_config(FIXTURES_DIR / "simple" / "pine.config.json")
+        result = bundle(config)
+
+        src_dir = (FIXTURES_DIR / "simple" / "src").resolve()
+        assert result.module_sources == {
+            path: path.read_text()
+            for path in (src_dir / "utils.pine", src_dir / "main.pine")
+        }
+
     def test_circular_dependency_error(self) -> None:
         """Test that circular dependencies raise error."""
         config = load_config(FIXTURES_DIR / "circular" / "pine.config.json")
@@ -142,6 +160,13 @@ plot(x)"""
         assert "array.new<line>(500)" in result
         assert "plot(x)" in result
 
+    def test_output_without_generic_calls_unchanged(self) -> None:
+        """Test that output with no .new calls is returned as-is."""
+        input_text = """indicator("Test")
+x = 1 < 2
+plot(x)"""
+        assert _postprocess_output(input_text) is input_text
+
 
 class TestImportDeduplication:
     """Tests for import deduplication functionality."""
@@ -184,3 +209,102 @@ class TestImportDeduplication:
         ]
         result = _deduplicate_imports(imports)
         assert len(result) == 2
+
+
+class TestAnalyzeModule:
+    """Tests for the _analyze_module function."""
+
+    def test_collects_identifiers_and_imports(self, tmp_path: Path) -> None:
+        """Test that identifiers and external imports come from one scan."""
+        module_file = tmp_path / "utils.pine"
+        module_file.write_text("""//@version=5
+import TradingView/ta/9 as ta
+helper(x) => ta.sma(x, 14)
+method size2(array<int> arr) => arr.size()
+[a, b] = [1, 2]
+var float level = na
+""")
+        identifiers, imports = _analyze_module(parse_module(module_file))
+
+        assert identifiers == ["helper", "a", "b", "level"]
+        assert len(imports) == 1
+        assert imports[0].name == "ta"
+
+
+class TestExtractDeclaration:
+    """Tests for the _extract_declaration function."""
+
+    def test_finds_strategy_declaration(self, tmp_path: Path) -> None:
+        """Test that strategy() is split from the other statements."""
+        module_file = tmp_path / "main.pine"
+        module_file.write_text("""//@version=5
+x = ta.sma(close, 14)
+strategy("My Strategy", overlay=true)
+plot(x)
+""")
+        declaration, other = _extract_declaration(parse_module(module_file))
+
+        assert declaration is not None
+        assert declaration.value.func.id == "strategy"
+        assert len(other) == 2
+
+
+class TestUnparseStatements:
+    """Tests for the unparse_statements function."""
+
+    def test_matches_unparsing_each_statement(self) -> None:
+        """Test that batch unparsing joins the per-statement output."""
+        from pynescript.ast import parse
+
+        ast = parse("""//@version=5
+indicator("Test")
+f(x) =>
+    y = x * 2
+    y + 1
+var float level = na
+if close > open
+    level := close
+plot(level)
+""")
+        expected = "\n".join(unparse_single(stmt) for stmt in ast.body)
+        assert unparse_statements(ast.body) == expected
+
+    def test_empty_body(self) -> None:
+        """Test that an empty statement list unparses to nothing."""
+        assert unparse_statements([]) == ""
+
+
+class TestStripVersionLines:
+    """Tests for the _strip_version_lines function."""
+
+    def test_removes_version_lines(self) -> None:
+        """Test that version annotations are dropped wherever they appear."""
+        text = "//@version=5\nx = 1\n//@version=6\nplot(x)\n//@version=5"
+        assert _strip_version_lines(text) == "x = 1\nplot(x)"
+
+    def test_text_without_version_unchanged(self) -> None:
+        """Test that text without version lines is returned as-is."""
+        text = "x = 1\nplot(x)"
+        assert _strip_version_lines(text) is text
+
+
+class TestWriteBundle:
+    """Tests for the write_bundle function."""
+
+    def test_creates_output_directory(self, tmp_path: Path) -> None:
+        """Test that missing output directories are created."""
+        output_path = tmp_path / "dist" / "nested" / "bundle.pine"
+        result = BundleResult("plot(close)\n", 1, tmp_path / "main.pine", output_path)
+
+        write_bundle(result)
+        assert output_path.read_text() == "plot(close)\n"
+
+    def test_replaces_existing_output(self, tmp_path: Path) -> None:
+        """Test that an existing bundle is replaced without leftover files."""
+        output_path = tmp_path / "bundle.pine"
+        output_path.write_text("old")
+        result = BundleResult("// → new\n", 1, tmp_path / "main.pine", output_path)
+
+        write_bundle(result)
+        assert output_path.read_bytes() == "// → new\n".encode("utf-8")
+        assert list(tmp_path.iterdir()) == [output_path]
@@ -4,7 +4,7 @@ import json
 import pytest
 from pathlib import Path
 
-from pinecone.config import load_config, PineconeConfig
+from pinecone.config import load_config, user_cache_dir, PineconeConfig
 from pinecone.errors import ConfigError
 
 
@@ -100,3 +100,66 @@ class TestLoadConfig:
         with pytest.raises(ConfigError) as exc_info:
             load_config(config_file)
         assert "must be a JSON object" in str(exc_info.value)
+
+    def test_cache_disabled_by_default(self, tmp_path: Path) -> None:
+        config_file = tmp_path / "pine.config.json"
+        config_file.write_text(json.dumps({
+            "entry": "src/main.pine",
+            "output": "dist/bundle.pine"
+        }))
+        src_dir = tmp_path / "src"
+        src_dir.mkdir()
+        (src_dir / "main.pine").write_text("//@version=5")
+
+        config = load_config(config_file)
+        assert config.cache_enabled is False
+
+    def test_cache_dir_outside_project(self, tmp_path: Path) -> None:
+        """Test that each project gets its own cache directory outside its tree."""
+        first = PineconeConfig(
+            entry=tmp_path / "a" / "main.pine",
+            output=tmp_path / "a" / "bundle.pine",
+            root_dir=tmp_path / "a",
+        )
+        second = PineconeConfig(
+            entry=tmp_path / "b" / "main.pine",
+            output=tmp_path / "b" / "bundle.pine",
+            root_dir=tmp_path / "b",
+        )
+        assert first.cache_dir.parent == user_cache_dir()
+        assert not first.cache_dir.is_relative_to(tmp_path)
+        assert first.cache_dir != second.cache_dir
+
+    def test_user_cache_dir_follows_xdg(self, tmp_path: Path, monkeypatch) -> None:
+        monkeypatch.setattr("sys.platform", "linux")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        assert user_cache_dir() == tmp_path / "pinecone"
+
+        # Relative values are ignored, as the XDG spec requires
+        monkeypatch.setenv("XDG_CACHE_HOME", "relative")
+        assert user_cache_dir() == Path.home() / ".cache" / "pinecone"
+
+    def test_cache_enabled(self, tmp_path: Path) -> None:
+        config_file = tmp_path / "pine.config.json"
+        config_file.write_text(json.dumps({
+            "entry": "src/main.pine",
+            "output": "dist/bundle.pine",
+            "cache": True
+        }))
+        src_dir = tmp_path / "src"
+        src_dir.mkdir()
+        (src_dir / "main.pine").write_text("//@version=5")
+
+        config = load_config(config_file)
+        assert config.cache_enabled is True
+
+    def test_cache_not_bool(self, tmp_path: Path) -> None:
+        config_file = tmp_path / "pine.config.json"
+        config_file.write_text(json.dumps({
+            "entry": "src/main.pine",
+            "output": "dist/bundle.pine",
+            "cache": "yes"
+        }))
+        with pytest.raises(ConfigError) as exc_info:
+            load_config(config_file)
+        assert "'cache' must be true or false" in str(exc_info.value)
@@ -7,6 +7,7 @@ from pinecone.directives import (
     ImportDirective,
     get_all_exported_names,
     get_all_imported_names,
+    parse_directives,
     parse_exports,
     parse_imports,
 )
@@ -115,6 +116,18 @@ line 3"""
         imports = parse_imports(source)
         assert imports[0].line_number == 2
 
+    def test_names_spanning_lines(self) -> None:
+        source = """//@version=5
+// @import { a,
+//   b } from "./x.pine"
+// @import { c } from "./y.pine"
+"""
+        imports = parse_imports(source)
+        assert imports == [
+            ImportDirective(names=["a", "b"], from_path="./x.pine", line_number=2),
+            ImportDirective(names=["c"], from_path="./y.pine", line_number=4),
+        ]
+
     def test_no_imports(self) -> None:
         source = "// just a comment\nsome code"
         imports = parse_imports(source)
@@ -133,6 +146,49 @@ result = double(close)
         assert imports[0].from_path == "./math_utils.pine"
 
 
+class TestParseDirectives:
+    """Tests for parse_directives function."""
+
+    def test_exports_and_imports_in_one_pass(self) -> None:
+        source = """//@version=5
+// @import { double } from "./math.pine"
+// @export formatResult
+
+formatResult(x) =>
+    double(x)
+"""
+        exports, imports = parse_directives(source)
+        assert len(exports) == 1
+        assert exports[0].names == ["formatResult"]
+        assert exports[0].line_number == 3
+        assert len(imports) == 1
+        assert imports[0].names == ["double"]
+        assert imports[0].from_path == "./math.pine"
+        assert imports[0].line_number == 2
+
+    def test_mixed_quotes_and_trailing_comments(self) -> None:
+        source = """
+// @export foo, bar
+x = 1 // trailing comment
+// @import { a } from "./a.pine" // shared helpers
+// @export baz
+// @import { b, c } from './b.pine'
+"""
+        exports, imports = parse_directives(source)
+        assert exports == [
+            ExportDirective(names=["foo", "bar"], line_number=2),
+            ExportDirective(names=["baz"], line_number=5),
+        ]
+        assert imports == [
+            ImportDirective(names=["a"], from_path="./a.pine", line_number=4),
+            ImportDirective(names=["b", "c"], from_path="./b.pine", line_number=6),
+        ]
+
+    def test_no_directives(self) -> None:
+        source = "//@version=5\nindicator(\"Test\")\nplot(close)"
+        assert parse_directives(source) == ([], [])
+
+
 class TestHelperFunctions:
     """Tests for helper functions."""
 
@@ -1,234 +1,241 @@
 """Tests for identifier renaming."""
 
+from collections.abc import Callable
 from pathlib import Path
+from typing import Any
 
 import pytest
-from pynescript.ast import parse
+from pynescript.ast import Assign, BinOp, FunctionDef, Name, Tuple, unparse
 
 from pinecone.renamer import (
     build_rename_map,
     path_to_prefix,
     extract_top_level_identifiers,
+    rename_tree,
     IdentifierRenamer,
 )
 
 
-class TestPathToPrefix:
-    """Tests for path_to_prefix function."""
+ROOT = Path("/project")
+UTILS = ROOT / "src" / "utils.pine"
+
+
+PRELUDE = '//@version=6\nindicator("test")\n'
+
+# Sources are module constants so every test, parametrized case and -k
+# selection hits the same parse_cached entry for a given snippet.
+_SRC_VARS = PRELUDE + "x = 1\ny = 2\n"
+_SRC_FUNCS = PRELUDE + "myFunc() => 1\nanotherFunc(x) => x * 2\n"
+_SRC_METHOD = PRELUDE + """\
+method myMethod(array<int> arr, int x) => arr.push(x)
+regularFunc() => 1
+"""
+_SRC_TUPLE = PRELUDE + "[a, b] = [1, 2]\n"
+_SRC_VAR_DECLS = PRELUDE + "var x = 1\nvar float y = na\n"
+_SRC_EMPTY = PRELUDE
+_SRC_DECLARATIONS = PRELUDE + """\
+myFunc() => 1
+method myMethod(array<int> arr) => arr.size()
+myVar = 1
+[a, b] = [1, 2]
+"""
+_SRC_REFERENCES = PRELUDE + "x = 1\ny = x + 1\n"
+_SRC_SINGLE_VAR = PRELUDE + "x = 1\n"
+_SRC_NESTED_REFS = PRELUDE + """\
+helper(x) => x * 2
+method scaled(array<float> arr) => helper(arr.first())
+calc(y) => helper(y) + 1
+"""
 
-    def test_simple_file(self) -> None:
-        path = Path("/project/src/utils.pine")
-        root = Path("/project")
-        # src/ is stripped from prefix for cleaner names
-        assert path_to_prefix(path, root) == "__utils__"
 
-    def test_nested_file(self) -> None:
-        path = Path("/project/src/utils/math.pine")
-        root = Path("/project")
-        assert path_to_prefix(path, root) == "__utils_math__"
+def _index_body(ast: Any) -> dict[type, list[Any]]:
+    """Group a module's top-level function defs and assignments in one pass."""
+    index: dict[type, list[Any]] = {FunctionDef: [], Assign: []}
+    for stmt in ast.body:
+        nodes = index.get(type(stmt))
+        if nodes is not None:
+            nodes.append(stmt)
+    return index
 
-    def test_strips_src_prefix(self) -> None:
-        # src/ should be stripped from the prefix
-        path = Path("/project/src/helpers.pine")
-        root = Path("/project")
-        prefix = path_to_prefix(path, root)
-        assert prefix == "__helpers__"
 
-    def test_deep_nesting(self) -> None:
-        path = Path("/project/src/indicators/momentum/rsi.pine")
-        root = Path("/project")
-        assert path_to_prefix(path, root) == "__indicators_momentum_rsi__"
+class TestPathToPrefix:
+    """Tests for path_to_prefix function."""
+
+    @pytest.mark.parametrize(
+        "path,expected",
+        [
+            # src/ is stripped from prefix for cleaner names
+            (UTILS, "__utils__"),
+            (ROOT / "src" / "utils" / "math.pine", "__utils_math__"),
+            (ROOT / "src" / "helpers.pine", "__helpers__"),
+            (ROOT / "src" / "indicators" / "momentum" / "rsi.pine", "__indicators_momentum_rsi__"),
+        ],
+        ids=["simple_file", "nested_file", "strips_src_prefix", "deep_nesting"],
+    )
+    def test_path_to_prefix(self, path: Path, expected: str) -> None:
+        assert path_to_prefix(path, ROOT) == expected
 
 
 class TestBuildRenameMap:
     """Tests for build_rename_map function."""
 
-    def test_single_export(self) -> None:
-        exports = ["myFunc"]
-        path = Path("/project/src/utils.pine")
-        root = Path("/project")
-        renames = build_rename_map(exports, path, root)
-        assert renames == {"myFunc": "__utils__myFunc"}
-
-    def test_multiple_exports(self) -> None:
-        exports = ["foo", "bar", "baz"]
-        path = Path("/project/src/utils.pine")
-        root = Path("/project")
-        renames = build_rename_map(exports, path, root)
-        assert renames == {
-            "foo": "__utils__foo",
-            "bar": "__utils__bar",
-            "baz": "__utils__baz",
-        }
-
-    def test_empty_exports(self) -> None:
-        renames = build_rename_map([], Path("/project/utils.pine"), Path("/project"))
-        assert renames == {}
+    @pytest.mark.parametrize(
+        "exports,path,expected",
+        [
+            (["myFunc"], UTILS, {"myFunc": "__utils__myFunc"}),
+            (
+                ["foo", "bar", "baz"],
+                UTILS,
+                {"foo": "__utils__foo", "bar": "__utils__bar", "baz": "__utils__baz"},
+            ),
+            ([], ROOT / "utils.pine", {}),
+        ],
+        ids=["single_export", "multiple_exports", "empty_exports"],
+    )
+    def test_build_rename_map(
+        self, exports: list[str], path: Path, expected: dict[str, str]
+    ) -> None:
+        assert build_rename_map(exports, path, ROOT) == expected
+
+    def test_new_names_are_interned(self) -> None:
+        first = build_rename_map(["foo"], UTILS, ROOT)
+        second = build_rename_map(["foo"], UTILS, ROOT)
+        assert first["foo"] is second["foo"]
 
 
 class TestExtractTopLevelIdentifiers:
     """Tests for extract_top_level_identifiers function."""
 
-    def test_extracts_variable_declarations(self) -> None:
-        """Test that variable declarations are extracted."""
-        source = """//@version=6
-indicator("test")
-x = 1
-y = 2
-"""
-        ast = parse(source)
-        identifiers = extract_top_level_identifiers(ast)
-        assert "x" in identifiers
-        assert "y" in identifiers
-
-    def test_extracts_function_definitions(self) -> None:
-        """Test that function definitions are extracted."""
-        source = """//@version=6
-indicator("test")
-myFunc() => 1
-anotherFunc(x) => x * 2
-"""
-        ast = parse(source)
-        identifiers = extract_top_level_identifiers(ast)
-        assert "myFunc" in identifiers
-        assert "anotherFunc" in identifiers
-
-    def test_excludes_method_definitions(self) -> None:
-        """Test that method definitions are NOT extracted."""
-        source = """//@version=6
-indicator("test")
-method myMethod(array<int> arr, int x) => arr.push(x)
-regularFunc() => 1
-"""
-        ast = parse(source)
-        identifiers = extract_top_level_identifiers(ast)
-        assert "myMethod" not in identifiers
-        assert "regularFunc" in identifiers
-
-    def test_extracts_tuple_unpacking(self) -> None:
-        """Test that tuple unpacking variables are extracted."""
-        source = """//@version=6
-indicator("test")
-[a, b] = [1, 2]
-"""
-        ast = parse(source)
-        identifiers = extract_top_level_identifiers(ast)
-        assert "a" in identifiers
-        assert "b" in identifiers
-
-    def test_extracts_var_declarations(self) -> None:
-        """Test that var declarations are extracted."""
-        source = """//@version=6
-indicator("test")
-var x = 1
-var float y = na
-"""
-        ast = parse(source)
-        identifiers = extract_top_level_identifiers(ast)
-        assert "x" in identifiers
-        assert "y" in identifiers
-
-    def test_empty_module(self) -> None:
-        """Test that empty module returns empty list."""
-        source = """//@version=6
-indicator("test")
-"""
-        ast = parse(source)
-        identifiers = extract_top_level_identifiers(ast)
-        # Should only have no variable/function identifiers
-        # (indicator is a call, not a definition)
-        assert len(identifiers) == 0
+    @pytest.mark.parametrize(
+        "source,included,excluded",
+        [
+            (_SRC_VARS, {"x", "y"}, set()),
+            (_SRC_FUNCS, {"myFunc", "anotherFunc"}, set()),
+            # Method definitions are NOT extracted
+            (_SRC_METHOD, {"regularFunc"}, {"myMethod"}),
+            (_SRC_TUPLE, {"a", "b"}, set()),
+            (_SRC_VAR_DECLS, {"x", "y"}, set()),
+        ],
+        ids=[
+            "variable_declarations",
+            "function_definitions",
+            "excludes_method_definitions",
+            "tuple_unpacking",
+            "var_declarations",
+        ],
+    )
+    def test_extract(
+        self, parse_cached, source: str, included: set[str], excluded: set[str]
+    ) -> None:
+        identifiers = extract_top_level_identifiers(parse_cached(source))
+        assert included <= identifiers
+        assert not excluded & identifiers
+
+    def test_empty_module(self, parse_cached) -> None:
+        """Test that empty module returns an empty set."""
+        # indicator is a call, not a definition
+        identifiers = extract_top_level_identifiers(parse_cached(_SRC_EMPTY))
+        assert identifiers == frozenset()
+
+
+def _check_declarations(ast: Any) -> None:
+    """Check function, variable and tuple declarations were renamed, methods not."""
+    index = _index_body(ast)
+
+    # Function defs are renamed; the method def keeps its name
+    fdefs = [f for f in index[FunctionDef] if not f.method]
+    assert [f.name for f in fdefs] == ["__prefix__myFunc"]
+    method_node = next((f for f in index[FunctionDef] if f.method), None)
+    assert method_node is not None
+    assert method_node.name == "myMethod"  # Should NOT be renamed
+
+    # Find the assignments and check targets are renamed
+    assigns = index[Assign]
+    assert [a.target.id for a in assigns if type(a.target) is Name] == ["__prefix__myVar"]
+    for stmt in assigns:
+        if type(stmt.target) is Tuple:
+            names = [elt.id for elt in stmt.target.elts]
+            assert "__prefix__a" in names
+            assert "__prefix__b" in names
+
+
+def _check_references(ast: Any) -> None:
+    """Check the reference to x in `y = x + 1` was renamed."""
+    for stmt in _index_body(ast)[Assign]:
+        match stmt:
+            case Assign(target=Name(id="y"), value=BinOp(left=Name(id=left_id))):
+                # Check the left side of the BinOp
+                assert left_id == "__prefix__x"
+                return
+    pytest.fail("no `y = x + 1` assignment found")
 
 
 class TestIdentifierRenamer:
     """Tests for IdentifierRenamer class."""
 
-    def test_renames_function_definitions(self) -> None:
-        """Test that function definitions are renamed."""
-        source = """//@version=6
-indicator("test")
-myFunc() => 1
-"""
-        ast = parse(source)
-        renames = {"myFunc": "__prefix__myFunc"}
-        renamer = IdentifierRenamer(renames)
-        renamer.visit(ast)
-
-        # Find the function def and check its name
-        from pynescript.ast import FunctionDef
-        for stmt in ast.body:
-            if isinstance(stmt, FunctionDef):
-                assert stmt.name == "__prefix__myFunc"
-
-    def test_skips_method_definitions(self) -> None:
-        """Test that method definitions are NOT renamed."""
-        source = """//@version=6
-indicator("test")
-method myMethod(array<int> arr) => arr.size()
-"""
-        ast = parse(source)
-        renames = {"myMethod": "__prefix__myMethod"}
-        renamer = IdentifierRenamer(renames)
-        renamer.visit(ast)
-
-        # Find the method def and check its name is unchanged
-        for stmt in ast.body:
-            if hasattr(stmt, "name") and hasattr(stmt, "method"):
-                if stmt.method:
-                    assert stmt.name == "myMethod"  # Should NOT be renamed
-
-    def test_renames_variable_declarations(self) -> None:
-        """Test that variable declarations are renamed."""
-        source = """//@version=6
-indicator("test")
-myVar = 1
-"""
-        ast = parse(source)
-        renames = {"myVar": "__prefix__myVar"}
-        renamer = IdentifierRenamer(renames)
-        renamer.visit(ast)
-
-        # Find the assignment and check target is renamed
-        from pynescript.ast import Assign
-        for stmt in ast.body:
-            if isinstance(stmt, Assign):
-                assert stmt.target.id == "__prefix__myVar"
-
-    def test_renames_variable_references(self) -> None:
-        """Test that variable references are renamed."""
-        source = """//@version=6
-indicator("test")
-x = 1
-y = x + 1
-"""
-        ast = parse(source)
-        renames = {"x": "__prefix__x"}
-        renamer = IdentifierRenamer(renames)
-        renamer.visit(ast)
-
-        # The reference to x in `y = x + 1` should be renamed
-        from pynescript.ast import Assign, BinOp
-        for stmt in ast.body:
-            if isinstance(stmt, Assign) and hasattr(stmt.target, "id"):
-                if stmt.target.id == "y":
-                    # Check the left side of the BinOp
-                    assert stmt.value.left.id == "__prefix__x"
-
-    def test_renames_tuple_unpacking(self) -> None:
-        """Test that tuple unpacking targets are renamed."""
-        source = """//@version=6
-indicator("test")
-[a, b] = [1, 2]
-"""
-        ast = parse(source)
-        renames = {"a": "__prefix__a", "b": "__prefix__b"}
-        renamer = IdentifierRenamer(renames)
-        renamer.visit(ast)
-
-        # Find the tuple assignment and check targets
-        from pynescript.ast import Assign, Tuple
-        for stmt in ast.body:
-            if isinstance(stmt, Assign) and isinstance(stmt.target, Tuple):
-                names = [elt.id for elt in stmt.target.elts]
-                assert "__prefix__a" in names
-                assert "__prefix__b" in names
+    @pytest.mark.parametrize(
+        "source,renames,check",
+        [
+            (
+                _SRC_DECLARATIONS,
+                {
+                    "myFunc": "__prefix__myFunc",
+                    "myMethod": "__prefix__myMethod",
+                    "myVar": "__prefix__myVar",
+                    "a": "__prefix__a",
+                    "b": "__prefix__b",
+                },
+                _check_declarations,
+            ),
+            (
+                _SRC_REFERENCES,
+                {"x": "__prefix__x"},
+                _check_references,
+            ),
+        ],
+        ids=["declarations", "references"],
+    )
+    def test_renames(
+        self,
+        parse_cached,
+        source: str,
+        renames: dict[str, str],
+        check: Callable[[Any], None],
+    ) -> None:
+        """Test that one visit applies the whole rename map."""
+        ast = parse_cached(source)
+        IdentifierRenamer(renames).visit(ast)
+        check(ast)
+
+    def test_empty_renames_leaves_tree_untouched(self, parse_cached) -> None:
+        """Test that an empty rename map returns the same, unchanged tree."""
+        ast = parse_cached(_SRC_SINGLE_VAR)
+        before = parse_cached(_SRC_SINGLE_VAR)
+        assert IdentifierRenamer({}).visit(ast) is ast
+        assert ast == before
+
+
+class TestRenameTree:
+    """Tests for rename_tree function."""
+
+    def test_renames_references_inside_bodies(self, parse_cached) -> None:
+        """Test that references nested in function and method bodies are renamed."""
+        ast = parse_cached(_SRC_NESTED_REFS)
+        rename_tree(ast, {"helper": "__utils__helper", "scaled": "__utils__scaled"})
+
+        output = unparse(ast)
+        assert "__utils__helper(x) =>" in output
+        assert "method scaled(" in output
+        assert "__utils__helper(arr.first())" in output
+        assert "__utils__helper(y) + 1" in output
+
+    def test_deeply_nested_tree(self) -> None:
+        """Test that nesting deeper than the recursion limit is handled."""
+        node = Name(id="x")
+        for _ in range(5000):
+            node = Tuple(elts=[node])
+        rename_tree(node, {"x": "y"})
+
+        while type(node) is Tuple:
+            node = node.elts[0]
+        assert node.id == "y"
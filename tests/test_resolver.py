@@ -0,0 +1,296 @@
+"""Tests for dependency resolution."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from pinecone import resolver
+from pinecone.errors import (
+    CircularDependencyError,
+    ExportNotFoundError,
+    ModuleNotFoundError,
+    ParseError,
+)
+from pinecone.resolver import (
+    _MODULE_CACHE,
+    invalidate,
+    parse_module,
+    resolve_dependencies,
+)
+
+
+SOURCE = """//@version=5
+// @export double
+
+double(x) =>
+    x * 2
+"""
+
+
+@pytest.fixture
+def tmp_path(tmp_path: Path) -> Path:
+    """Resolved tmp_path, since the resolver reports realpath'd module paths.
+
+    The temporary directory may sit behind a symlink (e.g. /var ->
+    /private/var on macOS).
+    """
+    return tmp_path.resolve()
+
+
+class TestInProcessModuleCache:
+    """Tests for the in-process module cache in parse_module."""
+
+    def test_hit_returns_fresh_copy(self, tmp_path: Path) -> None:
+        module_file = tmp_path / "math.pine"
+        module_file.write_text(SOURCE)
+
+        first = parse_module(module_file)
+        first.ast.body.clear()
+
+        second = parse_module(module_file)
+        assert second is not first
+        assert second.exported_names == ["double"]
+        assert len(second.ast.body) == 1
+
+    def test_unchanged_file_not_reparsed(self, tmp_path: Path, monkeypatch) -> None:
+        module_file = tmp_path / "math.pine"
+        module_file.write_text(SOURCE)
+        parse_module(module_file)
+
+        monkeypatch.setattr("pinecone.resolver.parse", None)
+        assert parse_module(module_file).exported_names == ["double"]
+
+    def test_modified_file_is_reparsed(self, tmp_path: Path) -> None:
+        module_file = tmp_path / "math.pine"
+        module_file.write_text(SOURCE)
+        parse_module(module_file)
+
+        module_file.write_text(SOURCE.replace("double", "triple"))
+        st = module_file.stat()
+        os.utime(module_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        assert parse_module(module_file).exported_names == ["triple"]
+
+    def test_invalidate_drops_entry(self, tmp_path: Path) -> None:
+        module_file = tmp_path / "math.pine"
+        module_file.write_text(SOURCE)
+        parse_module(module_file)
+        assert module_file.resolve() in _MODULE_CACHE
+
+        invalidate(module_file)
+        assert module_file.resolve() not in _MODULE_CACHE
+
+    def test_resolve_reuses_parsed_modules(self, tmp_path: Path, monkeypatch) -> None:
+        (tmp_path / "math.pine").write_text(SOURCE)
+        (tmp_path / "main.pine").write_text(
+            '//@version=5\n// @import { double } from "./math.pine"\n'
+            'indicator("Test")\nplot(double(close))\n'
+        )
+        resolve_dependencies(tmp_path / "main.pine", tmp_path)
+
+        monkeypatch.setattr("pinecone.resolver.parse", None)
+        graph = resolve_dependencies(tmp_path / "main.pine", tmp_path)
+        assert all(module.ast is not None for module in graph.modules.values())
+
+
+class TestParseModuleCache:
+    """Tests for the on-disk parse cache in parse_module."""
+
+    def test_no_cache_dir_writes_nothing(self, tmp_path: Path) -> None:
+        module_file = tmp_path / "math.pine"
+        module_file.write_text(SOURCE)
+
+        parse_module(module_file)
+        assert list(tmp_path.iterdir()) == [module_file]
+
+    def test_cache_miss_then_hit(self, tmp_path: Path) -> None:
+        module_file = tmp_path / "math.pine"
+        module_file.write_text(SOURCE)
+        cache_dir = tmp_path / "cache"
+
+        first = parse_module(module_file, cache_dir)
+        assert len(list(cache_dir.glob("*.pkl"))) == 1
+
+        _MODULE_CACHE.clear()
+        second = parse_module(module_file, cache_dir)
+        assert second is not first
+        assert second.source == first.source
+        assert second.exported_names == ["double"]
+        assert second.ast == first.ast
+
+    def test_modified_file_is_reparsed(self, tmp_path: Path) -> None:
+        module_file = tmp_path / "math.pine"
+        module_file.write_text(SOURCE)
+        cache_dir = tmp_path / "cache"
+        parse_module(module_file, cache_dir)
+
+        module_file.write_text(SOURCE.replace("double", "triple"))
+        st = module_file.stat()
+        os.utime(module_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        module = parse_module(module_file, cache_dir)
+        assert module.exported_names == ["triple"]
+        # The new entry replaces the stale one instead of adding to it
+        assert len(list(cache_dir.iterdir())) == 1
+
+        _MODULE_CACHE.clear()
+        assert parse_module(module_file, cache_dir).exported_names == ["triple"]
+
+    def test_other_parser_version_is_reparsed(
+        self, tmp_path: Path, monkeypatch
+    ) -> None:
+        module_file = tmp_path / "math.pine"
+        module_file.write_text(SOURCE)
+        cache_dir = tmp_path / "cache"
+        parse_module(module_file, cache_dir)
+        _MODULE_CACHE.clear()
+
+        parsed = []
+        real_parse = resolver.parse
+
+        def counting_parse(source: str):
+            parsed.append(source)
+            return real_parse(source)
+
+        monkeypatch.setattr(resolver, "_parser_version", lambda: "0.0.0")
+        monkeypatch.setattr(resolver, "parse", counting_parse)
+
+        assert parse_module(module_file, cache_dir).exported_names == ["double"]
+        assert parsed == [SOURCE]
+
+    def test_corrupt_cache_entry_is_ignored(self, tmp_path: Path) -> None:
+        module_file = tmp_path / "math.pine"
+        module_file.write_text(SOURCE)
+        cache_dir = tmp_path / "cache"
+        parse_module(module_file, cache_dir)
+
+        for cache_file in cache_dir.glob("*.pkl"):
+            cache_file.write_bytes(b"not a pickle")
+        _MODULE_CACHE.clear()
+
+        module = parse_module(module_file, cache_dir)
+        assert module.exported_names == ["double"]
+
+
+class TestResolveDependencies:
+    """Tests for resolve_dependencies function."""
+
+    def test_all_modules_parsed(self, tmp_path: Path) -> None:
+        (tmp_path / "math.pine").write_text(SOURCE)
+        (tmp_path / "main.pine").write_text(
+            '//@version=5\n// @import { double } from "./math.pine"\n'
+            'indicator("Test")\nplot(double(close))\n'
+        )
+
+        graph = resolve_dependencies(tmp_path / "main.pine", tmp_path)
+        assert graph.order == [tmp_path / "math.pine", tmp_path / "main.pine"]
+        assert all(module.ast is not None for module in graph.modules.values())
+
+    def test_parse_error_in_dependency(self, tmp_path: Path) -> None:
+        (tmp_path / "broken.pine").write_text("//@version=5\n// @export x\nx = = 1\n")
+        (tmp_path / "main.pine").write_text(
+            '//@version=5\n// @import { x } from "./broken.pine"\n'
+            'indicator("Test")\nplot(x)\n'
+        )
+
+        with pytest.raises(ParseError) as exc_info:
+            resolve_dependencies(tmp_path / "main.pine", tmp_path)
+        assert exc_info.value.path == tmp_path / "broken.pine"
+
+    def test_parsed_modules_written_to_cache(self, tmp_path: Path) -> None:
+        (tmp_path / "math.pine").write_text(SOURCE)
+        (tmp_path / "main.pine").write_text(
+            '//@version=5\n// @import { double } from "./math.pine"\n'
+            'indicator("Test")\nplot(double(close))\n'
+        )
+        cache_dir = tmp_path / "cache"
+
+        resolve_dependencies(tmp_path / "main.pine", tmp_path, cache_dir)
+        assert len(list(cache_dir.glob("*.pkl"))) == 2
+
+        _MODULE_CACHE.clear()
+        graph = resolve_dependencies(tmp_path / "main.pine", tmp_path, cache_dir)
+        assert graph.modules[tmp_path / "math.pine"].exported_names == ["double"]
+
+    def test_cycle_reports_import_path(self, tmp_path: Path) -> None:
+        (tmp_path / "a.pine").write_text('// @import { b } from "./b.pine"\n// @export a\na = 1\n')
+        (tmp_path / "b.pine").write_text('// @import { a } from "./a.pine"\n// @export b\nb = 1\n')
+        (tmp_path / "main.pine").write_text('// @import { a } from "./a.pine"\nplot(a)\n')
+
+        with pytest.raises(CircularDependencyError) as exc_info:
+            resolve_dependencies(tmp_path / "main.pine", tmp_path)
+        assert exc_info.value.cycle == [
+            tmp_path / "a.pine",
+            tmp_path / "b.pine",
+            tmp_path / "a.pine",
+        ]
+
+    @pytest.mark.parametrize("first_import", ["a", "b"])
+    def test_cycle_starts_at_smallest_path(self, tmp_path: Path, first_import: str) -> None:
+        (tmp_path / "a.pine").write_text('// @import { b } from "./b.pine"\n// @export a\na = 1\n')
+        (tmp_path / "b.pine").write_text('// @import { a } from "./a.pine"\n// @export b\nb = 1\n')
+        (tmp_path / "main.pine").write_text(
+            f'// @import {{ {first_import} }} from "./{first_import}.pine"\nplot(1)\n'
+        )
+
+        with pytest.raises(CircularDependencyError) as exc_info:
+            resolve_dependencies(tmp_path / "main.pine", tmp_path)
+        assert exc_info.value.cycle == [
+            tmp_path / "a.pine",
+            tmp_path / "b.pine",
+            tmp_path / "a.pine",
+        ]
+        assert "a.pine → b.pine → a.pine" in str(exc_info.value)
+
+    def test_missing_export_in_shared_dependency(self, tmp_path: Path) -> None:
+        (tmp_path / "math.pine").write_text(SOURCE)
+        (tmp_path / "a.pine").write_text(
+            '// @import { double } from "./math.pine"\n// @export a\na = 1\n'
+        )
+        (tmp_path / "main.pine").write_text(
+            '// @import { a } from "./a.pine"\n'
+            '// @import { triple } from "./math.pine"\n'
+            'plot(a)\n'
+        )
+
+        with pytest.raises(ExportNotFoundError) as exc_info:
+            resolve_dependencies(tmp_path / "main.pine", tmp_path)
+        assert exc_info.value.name == "triple"
+        assert exc_info.value.from_line == 2
+
+    def test_missing_sibling_import(self, tmp_path: Path) -> None:
+        (tmp_path / "math.pine").write_text(SOURCE)
+        (tmp_path / "main.pine").write_text(
+            '// @import { double } from "./math.pine"\n'
+            '// @import { helper } from "./missing.pine"\n'
+            'plot(double(close))\n'
+        )
+
+        with pytest.raises(ModuleNotFoundError) as exc_info:
+            resolve_dependencies(tmp_path / "main.pine", tmp_path)
+        assert exc_info.value.import_path == "missing.pine"
+        assert exc_info.value.from_line == 2
+        assert sorted(exc_info.value.available) == ["main.pine", "math.pine"]
+
+    def test_missing_import_directory(self, tmp_path: Path) -> None:
+        (tmp_path / "main.pine").write_text(
+            '// @import { helper } from "./lib/missing.pine"\nplot(close)\n'
+        )
+
+        with pytest.raises(ModuleNotFoundError) as exc_info:
+            resolve_dependencies(tmp_path / "main.pine", tmp_path)
+        assert exc_info.value.import_path == "lib/missing.pine"
+        assert exc_info.value.available == []
+
+
+class TestModule:
+    """Tests for the Module dataclass."""
+
+    def test_exported_name_set(self, tmp_path: Path) -> None:
+        module_file = tmp_path / "math.pine"
+        module_file.write_text(SOURCE.replace("// @export double", "// @export double, half"))
+
+        module = parse_module(module_file)
+        assert module.exported_names == ["double", "half"]
+        assert module.exported_name_set == frozenset({"double", "half"})
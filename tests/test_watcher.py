@@ -0,0 +1,254 @@
+"""Tests for the watch-mode rebuild handler."""
+
+import queue
+import shutil
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+from watchdog.events import FileDeletedEvent, FileModifiedEvent
+
+from pinecone.bundler import BundleResult, bundle
+from pinecone.config import PineconeConfig, load_config
+from pinecone.watcher import PineFileHandler
+
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Generous: the first build in a session pays for the parser's warm-up
+TIMEOUT = 60
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    """Copy the simple fixture project into a temporary directory."""
+    # Resolved, since the bundle reports realpath'd module paths
+    root = tmp_path.resolve() / "simple"
+    shutil.copytree(FIXTURES_DIR / "simple", root)
+    return root
+
+
+class RecordingHandler(PineFileHandler):
+    """PineFileHandler that records outcomes and scheduled rebuilds.
+
+    Rebuilds are never handed to the worker thread; tests call
+    _do_rebuild() themselves.
+    """
+
+    def __init__(self, config: PineconeConfig) -> None:
+        self.results: list[BundleResult] = []
+        self.errors: list[Exception] = []
+        self.scheduled = 0
+        super().__init__(config, self.results.append, self.errors.append)
+
+    def _schedule_rebuild(self) -> None:
+        self.scheduled += 1
+
+
+@pytest.fixture
+def make_handler(project: Path) -> Iterator[Callable[[], RecordingHandler]]:
+    """Create handlers for the copied project, stopping them afterwards."""
+    handlers: list[RecordingHandler] = []
+
+    def make() -> RecordingHandler:
+        handler = RecordingHandler(load_config(project / "pine.config.json"))
+        handlers.append(handler)
+        return handler
+
+    yield make
+    for handler in handlers:
+        handler.stop()
+
+
+@pytest.fixture
+def handler(make_handler: Callable[[], RecordingHandler]) -> RecordingHandler:
+    """Handler for the copied project, after one successful build."""
+    handler = make_handler()
+    handler._do_rebuild()
+    assert len(handler.results) == 1
+    return handler
+
+
+class TestDoRebuild:
+    """Tests for skipping rebuilds when no bundled file changed."""
+
+    def test_records_bundled_module_digests(self, handler: RecordingHandler) -> None:
+        src_dir = handler.config.src_dir
+        assert set(handler._module_digests) == {
+            str(src_dir / "main.pine"),
+            str(src_dir / "utils.pine"),
+        }
+
+    def test_unchanged_content_is_skipped(self, handler: RecordingHandler) -> None:
+        # Rewriting identical content bumps the mtime but not the digest
+        utils = handler.config.src_dir / "utils.pine"
+        utils.write_text(utils.read_text())
+
+        handler._do_rebuild()
+        assert len(handler.results) == 1
+        assert not handler.errors
+
+    def test_edit_rebuilds(self, handler: RecordingHandler) -> None:
+        utils = handler.config.src_dir / "utils.pine"
+        utils.write_text(utils.read_text().replace("x * 2", "x * 3"))
+
+        handler._do_rebuild()
+        assert len(handler.results) == 2
+        assert "x * 3" in handler.results[-1].output
+
+    def test_deletion_rebuilds(self, handler: RecordingHandler) -> None:
+        (handler.config.src_dir / "utils.pine").unlink()
+
+        handler._do_rebuild()
+        assert len(handler.results) == 1
+        assert len(handler.errors) == 1
+
+    def test_save_during_build_rebuilds(self, make_handler, monkeypatch) -> None:
+        handler = make_handler()
+        utils = handler.config.src_dir / "utils.pine"
+
+        def bundle_then_save(config: PineconeConfig) -> BundleResult:
+            result = bundle(config)
+            utils.write_text(utils.read_text().replace("x * 2", "x * 3"))
+            return result
+
+        monkeypatch.setattr("pinecone.watcher.bundle", bundle_then_save)
+        handler._do_rebuild()
+        monkeypatch.setattr("pinecone.watcher.bundle", bundle)
+        assert "x * 3" not in handler.results[-1].output
+
+        # The save came after the sources were read, so it isn't bundled yet
+        handler._do_rebuild()
+        assert len(handler.results) == 2
+        assert "x * 3" in handler.results[-1].output
+
+    def test_failed_build_resets_digests(self, handler: RecordingHandler) -> None:
+        utils = handler.config.src_dir / "utils.pine"
+        source = utils.read_text()
+        utils.write_text(source + "x = = 1\n")
+
+        handler._do_rebuild()
+        assert len(handler.errors) == 1
+        assert handler._module_digests is None
+
+        # With no digests to compare against, the next build always runs,
+        # even though the file is now back to its last bundled content
+        utils.write_text(source)
+        handler._do_rebuild()
+        assert len(handler.results) == 2
+        assert handler._module_digests is not None
+
+
+class TestEventFiltering:
+    """Tests for which file events schedule a rebuild."""
+
+    def test_edit_to_bundled_file_schedules(self, handler: RecordingHandler) -> None:
+        handler.on_modified(FileModifiedEvent(str(handler.config.entry)))
+        assert handler.scheduled == 1
+
+    def test_edit_outside_graph_is_ignored(self, handler: RecordingHandler) -> None:
+        other = handler.config.src_dir / "other.pine"
+        other.write_text("//@version=5\n// @export x\nx = 1\n")
+
+        handler.on_modified(FileModifiedEvent(str(other)))
+        assert handler.scheduled == 0
+
+    def test_deletion_outside_graph_schedules(self, handler: RecordingHandler) -> None:
+        # A deleted file may be one an import was waiting for
+        handler.on_deleted(FileDeletedEvent(str(handler.config.src_dir / "other.pine")))
+        assert handler.scheduled == 1
+
+    def test_output_file_is_ignored(self, handler: RecordingHandler) -> None:
+        handler.on_deleted(FileDeletedEvent(str(handler.config.output)))
+        assert handler.scheduled == 0
+
+    def test_every_edit_schedules_before_first_build(self, make_handler) -> None:
+        handler = make_handler()
+        other = handler.config.src_dir / "other.pine"
+        handler.on_modified(FileModifiedEvent(str(other)))
+        assert handler.scheduled == 1
+
+
+class TestWorkerThread:
+    """Tests for the debounced rebuild worker."""
+
+    def test_raising_callback_keeps_rebuilding(
+        self,
+        project: Path,
+        capfd: pytest.CaptureFixture[str],
+        request: pytest.FixtureRequest,
+    ) -> None:
+        """Test that an exception from a callback doesn't stop later rebuilds."""
+        outcomes: queue.Queue = queue.Queue()
+        successes: list[BundleResult] = []
+
+        def on_success(result: BundleResult) -> None:
+            successes.append(result)
+            outcomes.put(result)
+            if len(successes) == 1:
+                raise RuntimeError("callback failed")
+
+        def on_error(error: Exception) -> None:
+            outcomes.put(error)
+            raise RuntimeError("error callback failed")
+
+        config = load_config(project / "pine.config.json")
+        handler = PineFileHandler(config, on_success, on_error, debounce_seconds=0.01)
+        request.addfinalizer(handler.stop)
+
+        handler.on_modified(FileModifiedEvent(str(config.entry)))
+        # The raising on_success is reported through on_error
+        assert isinstance(outcomes.get(timeout=TIMEOUT), BundleResult)
+        assert isinstance(outcomes.get(timeout=TIMEOUT), RuntimeError)
+
+        config.entry.write_text(config.entry.read_text() + "plot(close)\n")
+        handler.on_modified(FileModifiedEvent(str(config.entry)))
+        result = outcomes.get(timeout=TIMEOUT)
+        assert isinstance(result, BundleResult)
+        assert result.output.count("plot(") == 2
+        assert handler._worker.is_alive()
+        # The error callback's own failure is reported, not swallowed
+        assert "error callback failed" in capfd.readouterr().err
+
+    def test_burst_of_events_builds_once(
+        self, project: Path, monkeypatch, request: pytest.FixtureRequest
+    ) -> None:
+        builds: list[PineconeConfig] = []
+
+        def counting_bundle(config: PineconeConfig) -> BundleResult:
+            builds.append(config)
+            return bundle(config)
+
+        monkeypatch.setattr("pinecone.watcher.bundle", counting_bundle)
+        results: queue.Queue = queue.Queue()
+        config = load_config(project / "pine.config.json")
+        handler = PineFileHandler(
+            config, results.put, results.put, debounce_seconds=0.2
+        )
+        request.addfinalizer(handler.stop)
+
+        # An editor save or git checkout fires many events at once
+        for path in [config.entry, config.src_dir / "utils.pine"] * 10:
+            handler.on_modified(FileModifiedEvent(str(path)))
+
+        assert isinstance(results.get(timeout=TIMEOUT), BundleResult)
+        with pytest.raises(queue.Empty):
+            results.get(timeout=0.5)
+        assert len(builds) == 1
+
+    def test_stop_ends_worker(self, make_handler) -> None:
+        handler = make_handler()
+        handler.stop(timeout=TIMEOUT)
+        assert not handler._worker.is_alive()
+
+    def test_stop_drops_pending_rebuild(self, project: Path) -> None:
+        results: list[BundleResult] = []
+        config = load_config(project / "pine.config.json")
+        handler = PineFileHandler(
+            config, results.append, results.append, debounce_seconds=60
+        )
+
+        handler.on_modified(FileModifiedEvent(str(config.entry)))
+        handler.stop(timeout=TIMEOUT)
+        assert not handler._worker.is_alive()
+        assert not results